@@ -0,0 +1,215 @@
+"""
+Pre-aggregated price tables for main.py's analytics endpoints.
+
+get_deals.py builds them once per scrape, right after the Arrow copy of the
+history, and writes them as Arrow IPC files under price_aggregates/:
+- item_stores.arrow:  per item and store, min / median / last price, last seen, count
+- item_history.arrow: per item, daily lowest price per store, oldest first
+- weekly.arrow:       per ISO week and category, median / min / count, plus per-store medians
+- items.arrow:        one row per item key with its display name and row offsets into the first two
+
+Each API worker memory-maps the files (shared through the OS page cache like
+the history itself) and only keeps a small item key -> offsets dict, so a
+lookup slices a few rows out of a mapped table.
+
+Items are keyed by normalised name (case and whitespace folded), so
+'/cheapest?item=greek  YOGURT' finds 'Greek Yogurt'.
+"""
+import os
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+AGGREGATES_DIR = 'price_aggregates'
+INDEX_FILE = 'items.arrow'   # Its mtime stands for the whole directory (they're swapped in together)
+MIN_PRICE = 0.01   # Same cut-off the dashboard uses for placeholder prices
+SIGHTING_KEY = ["Date", "Store", "Original_Name", "Price_Value"]
+# Explicit ASCII whitespace: Python's \s also matches non-breaking spaces, Arrow's regex doesn't
+_SPACES = r"[ \t\n\r\f\v]+"
+
+
+def item_key(name):
+    return re.sub(_SPACES, " ", str(name)).strip(" ").lower()
+
+
+def _round2(values):
+    # Python's round(), as the API always used (numpy rounds some half-cents the other way)
+    return [round(v, 2) for v in values.tolist()]
+
+
+def _starts(keys):
+    """Row offsets where a sorted key column changes value."""
+    keys = np.asarray(keys, dtype=object)
+    return np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.array([], dtype=np.int64)
+
+
+# --- 1. BUILD (get_deals.py, once per scrape) ---
+def build_tables(table):
+    """Aggregate tables for a history Arrow table, as {name: pa.Table}."""
+    columns = [c for c in ("Date", "Store", "Item", "Category", "Price_Value", "Original_Name") if c in table.column_names]
+    df = table.select(columns).to_pandas(date_as_object=False)
+    df = df[df["Price_Value"] > MIN_PRICE].dropna(subset=["Date", "Store", "Item"])
+    # A flyer shared by several regions is stored once per region; count each sighting once
+    df = df.drop_duplicates(subset=[c for c in SIGHTING_KEY if c in df.columns])
+    df["Store"] = df["Store"].astype(str)
+    df["key"] = df["Item"].astype(str).str.replace(_SPACES, " ", regex=True).str.strip(" ").str.lower()
+
+    names = df.groupby("key")["Item"].first()   # Display name: first spelling in history order
+
+    # item_stores: min / median / count plus the price on the latest sighting
+    df = df.sort_values("Date", kind="stable")
+    grouped = df.groupby(["key", "Store"])
+    stats = grouped["Price_Value"].agg(["min", "median", "count"])
+    last = grouped.agg(last_price=("Price_Value", "last"), last_seen=("Date", "last"))
+    stores = stats.join(last).reset_index().sort_values(["key", "last_price", "Store"], kind="stable")
+    stores = stores.rename(columns={"Store": "store", "min": "min_price", "median": "median_price"})
+    stores["last_seen"] = stores["last_seen"].dt.strftime("%Y-%m-%d")
+    for col in ("last_price", "min_price", "median_price"):
+        stores[col] = _round2(stores[col])
+    stores = stores[["key", "store", "last_price", "min_price", "median_price", "last_seen", "count"]]
+
+    # item_history: lowest price per store per scrape date
+    history = df.groupby(["key", "Date", "Store"])["Price_Value"].min().reset_index()
+    history = history.rename(columns={"Date": "date", "Store": "store", "Price_Value": "price"})
+    history["date"] = history["date"].dt.strftime("%Y-%m-%d")
+    history["price"] = _round2(history["price"])
+
+    # items: both tables are sorted by key and hold the same keys, so offsets line up
+    store_starts, history_starts = _starts(stores["key"]), _starts(history["key"])
+    items = {
+        "key": stores["key"].to_numpy()[store_starts],
+        "item": names.loc[stores["key"].to_numpy()[store_starts]].astype(str).to_numpy(),
+        "stores_start": store_starts,
+        "stores_len": np.diff(np.r_[store_starts, len(stores)]),
+        "history_start": history_starts,
+        "history_len": np.diff(np.r_[history_starts, len(history)]),
+    }
+
+    return {
+        "items": pa.table(items),
+        "item_stores": pa.Table.from_pandas(stores.drop(columns="key"), preserve_index=False),
+        "item_history": pa.Table.from_pandas(history.drop(columns="key"), preserve_index=False),
+        "weekly": _weekly_table(df),
+    }
+
+
+_WEEKLY_SCHEMA = pa.schema([
+    ("week", pa.string()), ("category", pa.string()), ("store", pa.string()),
+    ("median_price", pa.float64()), ("min_price", pa.float64()), ("count", pa.int64()),
+])
+
+
+def _weekly_table(df):
+    """Category rows (store is null) followed by per-store median rows."""
+    if "Category" not in df.columns:
+        return _WEEKLY_SCHEMA.empty_table()
+    iso = df["Date"].dt.isocalendar()
+    df = df.assign(week=iso["year"].astype(str) + "-W" + iso["week"].astype(str).str.zfill(2),
+                   Category=df["Category"].astype(str))
+    summary = df.groupby(["week", "Category"])["Price_Value"].agg(["median", "min", "count"]).reset_index()
+    summary = summary.rename(columns={"Category": "category", "median": "median_price", "min": "min_price"})
+    by_store = df.groupby(["week", "Category", "Store"])["Price_Value"].median().reset_index()
+    by_store = by_store.rename(columns={"Category": "category", "Store": "store", "Price_Value": "median_price"})
+    weekly = pd.concat([summary.assign(store=None), by_store.assign(min_price=np.nan, count=0)], ignore_index=True)
+    for col in ("median_price", "min_price"):
+        weekly[col] = _round2(weekly[col])
+    return pa.Table.from_pandas(weekly[_WEEKLY_SCHEMA.names], schema=_WEEKLY_SCHEMA, preserve_index=False)
+
+
+def write_aggregates(table, path=AGGREGATES_DIR):
+    """Build the tables and replace the directory in one swap, like the clean Parquet dataset."""
+    tables = build_tables(table)
+    tmp_path, old_path = f"{path}.tmp{os.getpid()}", f"{path}.old{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name, data in tables.items():
+        with pa.OSFile(os.path.join(tmp_path, f"{name}.arrow"), 'wb') as sink:
+            with ipc.new_file(sink, data.schema) as writer:
+                writer.write_table(data)
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    # Workers still mapping the old files keep their pages until they reload
+    shutil.rmtree(old_path, ignore_errors=True)
+    return tables
+
+
+def aggregates_version(path=AGGREGATES_DIR):
+    index = os.path.join(path, INDEX_FILE)
+    return os.stat(index).st_mtime_ns if os.path.exists(index) else 0
+
+
+# --- 2. LOOKUPS (main.py, per worker) ---
+class PriceAggregates:
+    def __init__(self, tables):
+        self.item_stores = tables["item_stores"]
+        self.item_history = tables["item_history"]
+        items = tables["items"]
+        self.names = dict(zip(items["key"].to_pylist(), items["item"].to_pylist()))
+        self._offsets = dict(zip(items["key"].to_pylist(), zip(
+            items["stores_start"].to_pylist(), items["stores_len"].to_pylist(),
+            items["history_start"].to_pylist(), items["history_len"].to_pylist())))
+        self.weekly = self._weekly_dict(tables["weekly"])
+        self.latest_week = max(self.weekly) if self.weekly else None
+
+    @classmethod
+    def build(cls, table):
+        """In-process fallback when get_deals.py hasn't written current files."""
+        return cls(build_tables(table))
+
+    @classmethod
+    def open(cls, path=AGGREGATES_DIR):
+        tables = {}
+        for name in ("items", "item_stores", "item_history", "weekly"):
+            source = pa.memory_map(os.path.join(path, f"{name}.arrow"), 'r')
+            tables[name] = ipc.open_file(source).read_all()
+        return cls(tables)
+
+    @staticmethod
+    def _weekly_dict(weekly):
+        # Weeks x categories is small, so this one stays a plain dict
+        result = {}
+        rows = weekly.to_pydict()
+        for week, category, store, median, low, count in zip(*rows.values()):
+            if store is None:
+                result.setdefault(week, {})[category] = {
+                    "median_price": median,
+                    "min_price": low,
+                    "count": int(count),
+                    "store_medians": {},
+                }
+        for week, category, store, median, _, _ in zip(*rows.values()):
+            if store is not None:
+                result[week][category]["store_medians"][store] = median
+        return result
+
+    # --- Lookups ---
+    def name(self, item):
+        return self.names.get(item_key(item), item)
+
+    def cheapest(self, item, basis="last_price"):
+        offsets = self._offsets.get(item_key(item))
+        if offsets is None:
+            return None
+        stores = self.item_stores.slice(offsets[0], offsets[1]).to_pylist()
+        return sorted(stores, key=lambda s: (s[basis], s["store"]))
+
+    def history(self, item):
+        offsets = self._offsets.get(item_key(item))
+        if offsets is None:
+            return None
+        return self.item_history.slice(offsets[2], offsets[3]).to_pylist()
+
+    def compare(self, week=None, category=None):
+        week = week or self.latest_week
+        categories = self.weekly.get(week)
+        if categories is None:
+            return week, None
+        if category:
+            wanted = {c for c in categories if c.lower() == category.lower()}
+            categories = {c: v for c, v in categories.items() if c in wanted}
+        return week, categories
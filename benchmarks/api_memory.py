@@ -0,0 +1,93 @@
+"""
+Per-worker memory and cold start: CSV loader vs memory-mapped Arrow.
+
+Starts N worker processes that each load the history the way a uvicorn
+worker running main.py would, run one search so the data is touched, then
+wait until every worker has loaded before reading /proc. PSS splits shared
+pages between the processes mapping them, so it is the fair per-worker
+number; RSS counts shared file pages in full for every worker. Linux only.
+
+Usage:
+    python -m benchmarks.api_memory --synthetic 1M --workers 4
+"""
+import argparse
+import multiprocessing as mp
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_history, parse_size
+
+
+def _proc_kb(path, *fields):
+    values = {}
+    with open(path) as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in fields:
+                values[key] = int(rest.split()[0])
+    return values
+
+
+def _worker(mode, csv_path, arrow_path, barrier, results):
+    start = time.perf_counter()
+    if mode == "csv":
+        import pandas as pd
+        data = pd.read_csv(csv_path).fillna("")   # The loader main.py used before the Arrow file
+        hits = data["Item"].str.contains("milk", case=False, na=False).sum()
+    else:
+        import pyarrow.compute as pc
+        from columnar import open_dataset
+        data = open_dataset(csv_path, arrow_path)
+        hits = pc.sum(pc.match_substring(data["Item"], "milk", ignore_case=True)).as_py()
+    load_seconds = time.perf_counter() - start
+
+    barrier.wait()   # Every worker holds its data while we measure
+    status = _proc_kb("/proc/self/status", "VmRSS", "RssAnon", "RssFile")
+    rollup = _proc_kb("/proc/self/smaps_rollup", "Pss")
+    results.put({"load": load_seconds, "hits": hits, **status, **rollup})
+    barrier.wait()
+
+
+def run(mode, n_workers, csv_path, arrow_path):
+    ctx = mp.get_context("spawn")
+    barrier, results = ctx.Barrier(n_workers), ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(mode, csv_path, arrow_path, barrier, results)) for _ in range(n_workers)]
+    for p in procs:
+        p.start()
+    rows = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-worker memory of the CSV and Arrow loaders.")
+    parser.add_argument("--history", default="seton_grocery_history.csv")
+    parser.add_argument("--synthetic", help="Use a synthetic history of this size instead, e.g. 1M")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="grocery_api_mem_")
+    csv_path = args.history
+    if args.synthetic:
+        csv_path = os.path.join(workdir, "history.csv")
+        generate_history(parse_size(args.synthetic)).to_csv(csv_path, index=False)
+    arrow_path = os.path.join(workdir, "history.arrow")
+
+    from columnar import write_arrow
+    start = time.perf_counter()
+    write_arrow(csv_path, arrow_path)
+    print(f"Arrow build (once, in get_deals.py): {time.perf_counter() - start:.2f}s, "
+          f"{os.path.getsize(arrow_path) / 1e6:.1f}MB vs CSV {os.path.getsize(csv_path) / 1e6:.1f}MB")
+
+    print(f"{'loader':<7} {'load s':>7} {'RSS MB':>8} {'anon MB':>8} {'file MB':>8} {'PSS MB':>8}   (mean of {args.workers} workers)")
+    for mode in ("csv", "arrow"):
+        rows = run(mode, args.workers, csv_path, arrow_path)
+        mean = lambda key: sum(r[key] for r in rows) / len(rows)
+        print(f"{mode:<7} {mean('load'):>7.3f} {mean('VmRSS') / 1024:>8.1f} {mean('RssAnon') / 1024:>8.1f} "
+              f"{mean('RssFile') / 1024:>8.1f} {mean('Pss') / 1024:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Dashboard load time: clean CSV vs the partitioned Parquet dataset.
+
+Runs the cleaner on a synthetic history (CSV export on), then times how long
+the dashboard takes to get a usable DataFrame from each format:
+- csv:           pd.read_csv + re-parsing dates and prices (the old load_data)
+- parquet:       every column, every partition
+- parquet_cols:  only the dashboard's columns
+- parquet_90d:   the dashboard's columns, last 90 days of scrapes only
+
+Usage:
+    python -m benchmarks.clean_formats --sizes 100k,1M
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import generate_history, parse_size
+from columnar import dataset_bytes, load_clean_dataset
+
+DASHBOARD_COLUMNS = ['date', 'store', 'item', 'price', 'valid_until', 'category', 'display_category', 'sub_category', 'savings_pct']
+
+
+def load_csv(path):
+    df = pd.read_csv(path)
+    df['price'] = pd.to_numeric(df['price'], errors='coerce')
+    df['date'] = pd.to_datetime(df['date'], errors='coerce')
+    df['valid_until'] = pd.to_datetime(df['valid_until'], errors='coerce')
+    return df
+
+
+def best_of(fn, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run_size(n_rows, repeat):
+    import get_deals
+
+    history = generate_history(n_rows)
+    old_cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="grocery_formats_")
+    try:
+        os.chdir(workdir)   # get_deals uses paths relative to the working directory
+        history.to_csv(get_deals.HISTORY_FILE, index=False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            get_deals.run_post_processing_cleaner(export_csv=True)
+
+        csv_path, parquet_dir = get_deals.DASHBOARD_FILE, get_deals.DASHBOARD_DATASET
+        latest = max(name.split("=", 1)[1] for name in os.listdir(parquet_dir))
+        since = pd.Timestamp(latest) - pd.Timedelta(days=90)
+
+        print(f"\n=== {n_rows:,} rows  (csv {os.path.getsize(csv_path) / 1e6:.1f}MB, "
+              f"parquet {dataset_bytes(parquet_dir) / 1e6:.1f}MB in {len(os.listdir(parquet_dir))} partitions) ===")
+        cases = [
+            ("csv", lambda: load_csv(csv_path)),
+            ("parquet", lambda: load_clean_dataset(parquet_dir)),
+            ("parquet_cols", lambda: load_clean_dataset(parquet_dir, columns=DASHBOARD_COLUMNS)),
+            ("parquet_90d", lambda: load_clean_dataset(parquet_dir, columns=DASHBOARD_COLUMNS, since=since)),
+        ]
+        csv_seconds = None
+        for name, fn in cases:
+            seconds, df = best_of(fn, repeat)
+            csv_seconds = csv_seconds or seconds
+            mem_mb = df.memory_usage(deep=True).sum() / 1e6
+            print(f"   {name:<14} {seconds:8.3f} s  {csv_seconds / seconds:6.1f}x  {len(df):>10} rows  {mem_mb:8.1f} MB in memory")
+    finally:
+        os.chdir(old_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare clean CSV and Parquet load times.")
+    parser.add_argument("--sizes", default="100k,1M", help="Comma-separated history sizes (default 100k,1M)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for size in args.sizes.split(","):
+        run_size(parse_size(size), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
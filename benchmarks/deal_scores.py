@@ -0,0 +1,59 @@
+"""
+Rolling baseline cost: one full vectorized pass over the clean history.
+
+Cleans a synthetic history, then times add_deal_scores(), which rescores
+every row on each clean.
+
+Usage:
+    python -m benchmarks.deal_scores --sizes 100k,1M
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_history, parse_size
+from deal_scores import add_deal_scores
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def run_size(n_rows):
+    import get_deals
+
+    history = generate_history(n_rows)
+    old_cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="grocery_scores_")
+    try:
+        os.chdir(workdir)   # get_deals uses paths relative to the working directory
+        history.to_csv(get_deals.HISTORY_FILE, index=False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            clean = get_deals._clean_history()
+
+        full_s, scored = timed(lambda: add_deal_scores(clean))
+        groups = clean.groupby(["store", "item"]).ngroups
+
+        print(f"\n=== {n_rows:,} rows ({scored['deal_score'].notna().mean():.0%} scored) ===")
+        print(f"   full pass     {full_s:7.3f} s  {groups:>8} store/item groups")
+    finally:
+        os.chdir(old_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the rolling baseline pass.")
+    parser.add_argument("--sizes", default="100k,1M", help="Comma-separated history sizes (default 100k,1M)")
+    args = parser.parse_args()
+    for size in args.sizes.split(","):
+        run_size(parse_size(size))
+
+
+if __name__ == "__main__":
+    main()
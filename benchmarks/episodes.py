@@ -0,0 +1,64 @@
+"""
+Storage and query comparison: full history rows vs price episodes.
+
+Usage:
+    python -m benchmarks.episodes                    # the real seton_grocery_history.csv
+    python -m benchmarks.episodes --synthetic 1M     # a synthetic history of that size
+"""
+import argparse
+import io
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import generate_history, parse_size
+from price_episodes import EpisodeIndex, compact_history, expand_episodes
+
+QUERIES = ["milk", "eggs", "butter", "bread", "chicken", "apples", "cheese", "coffee"]
+
+
+def csv_bytes(df):
+    buf = io.StringIO()
+    df.to_csv(buf, index=False)
+    return len(buf.getvalue().encode())
+
+
+def time_queries(fn, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for q in QUERIES:
+            fn(q)
+    return (time.perf_counter() - start) / (repeat * len(QUERIES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare history rows with compacted price episodes.")
+    parser.add_argument("--history", default="seton_grocery_history.csv")
+    parser.add_argument("--synthetic", help="Use a synthetic history of this size instead, e.g. 100k")
+    args = parser.parse_args()
+
+    history = generate_history(parse_size(args.synthetic)) if args.synthetic else pd.read_csv(args.history)
+    history = pd.read_csv(io.StringIO(history.to_csv(index=False)))   # Same dtypes as a fresh load
+
+    start = time.perf_counter()
+    episodes = compact_history(history)
+    compact_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    expand_episodes(episodes)
+    expand_seconds = time.perf_counter() - start
+
+    rows_mb, episodes_mb = csv_bytes(history) / 1e6, csv_bytes(episodes) / 1e6
+    print(f"rows      {len(history):>10}  ->  episodes {len(episodes):>10}  ({1 - len(episodes) / len(history):.1%} fewer)")
+    print(f"CSV size  {rows_mb:>9.2f}MB  ->  {episodes_mb:>9.2f}MB  ({1 - episodes_mb / rows_mb:.1%} smaller)")
+    print(f"compact   {compact_seconds:.3f}s   expand {expand_seconds:.3f}s")
+
+    # Series lookup: main.py-style scan of every row vs the episode index
+    names = (history["Item"].fillna("") + " | " + history["Original_Name"].fillna("")).str.lower()
+    index = EpisodeIndex(episodes)
+    scan = time_queries(lambda q: history[names.str.contains(q, regex=False)].sort_values("Date"))
+    indexed = time_queries(lambda q: index.price_series(q))
+    print(f"query     {scan * 1000:.2f}ms/row scan  ->  {indexed * 1000:.2f}ms/episode index  ({scan / indexed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Cold-start import budget for the app entry points.
+
+Imports each entry point in a fresh interpreter with `python -X importtime`
+and fails (exit 1) if:
+- any module that should only load on first use shows up at import time, or
+- the entry point's cumulative import time exceeds its budget.
+
+main.py maps the history at import, so it runs in a scratch directory with
+a header-only history CSV: the budget covers its imports, not the data size.
+
+Streamlit apps run in bare mode with dummy keys, so module-level code runs
+as it would on the first page load. scanner_test.py still imports supabase
+there, because the community feed is fetched on every page load.
+
+Usage:
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --scale 2    # slower machine / CI
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# entry point -> (budget in ms, modules that must not be imported at startup)
+ENTRY_POINTS = {
+    "dashboard": (2000, ["google.generativeai", "plotly.express"]),
+    "scanner_test": (3000, ["google.generativeai", "PIL.Image", "pyzbar.pyzbar", "thefuzz.process"]),
+    "get_deals": (1200, ["sqlalchemy", "google.genai"]),
+    "main": (1500, ["sqlalchemy", "google.genai", "google.generativeai", "plotly.express"]),
+}
+# Entry points that load the history at import: timed against an empty one
+EMPTY_HISTORY = {"main"}
+HISTORY_FILE = "seton_grocery_history.csv"   # Same as main.csv_file
+DUMMY_ENV = {"GEMINI_API_KEY": "import-budget", "SUPABASE_URL": "http://localhost:9", "SUPABASE_KEY": "import-budget"}
+
+
+def import_profile(module):
+    """{module name: cumulative microseconds} from one cold import."""
+    env = dict(os.environ, **DUMMY_ENV)
+    cwd = REPO_DIR
+    if module in EMPTY_HISTORY:
+        from columnar import HISTORY_SCHEMA
+
+        cwd = tempfile.mkdtemp(prefix="grocery_import_")
+        with open(os.path.join(cwd, HISTORY_FILE), "w") as f:
+            f.write(",".join(HISTORY_SCHEMA.names) + "\n")
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_DIR, env.get("PYTHONPATH")]))
+    try:
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=cwd, env=env, capture_output=True, text=True,
+        )
+    finally:
+        if cwd != REPO_DIR:
+            shutil.rmtree(cwd, ignore_errors=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    profile = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+
+def check(module, budget_ms, forbidden, repeat):
+    runs = [import_profile(module) for _ in range(repeat)]
+    best_ms = min(run[module] for run in runs) / 1000
+    loaded = sorted({f for run in runs for name in run for f in forbidden
+                     if name == f or name.startswith(f + ".")})
+    return best_ms, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if app cold-start imports regress.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every time budget")
+    parser.add_argument("--repeat", type=int, default=3, help="Cold imports per entry point; best is kept")
+    args = parser.parse_args()
+
+    failures = []
+    for module, (budget_ms, forbidden) in ENTRY_POINTS.items():
+        budget_ms *= args.scale
+        best_ms, loaded = check(module, budget_ms, forbidden, args.repeat)
+        status = "✅" if best_ms <= budget_ms and not loaded else "❌"
+        print(f"{status} {module:<14} {best_ms:8.0f} ms  (budget {budget_ms:.0f} ms)")
+        if best_ms > budget_ms:
+            failures.append(f"{module}: {best_ms:.0f} ms > {budget_ms:.0f} ms budget")
+        if loaded:
+            failures.append(f"{module}: eagerly imports {', '.join(loaded)}")
+
+    if failures:
+        print("\n[!] Import budget exceeded:")
+        for line in failures:
+            print(f"   {line}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Multi-region scaling report.
+
+Simulates N postal codes whose flyer lists mostly share the same chain
+flyers (as Flipp does across a city), with a fixed per-request latency
+standing in for the network. Reports flyer-list wall time, how many flyer
+fetches the cross-region dedup saves, and rows fanned out per region.
+
+Usage:
+    python -m benchmarks.regions --regions 1,2,4,8,16 --latency 0.2
+"""
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import build_catalogue, load_seed, synthetic_flyers
+
+SHARED_FLYER_RATE = 0.85   # Share of a region's flyers that are the chain-wide edition
+
+
+def simulated_regions(n_regions, base_flyers, rng):
+    """Per-region flyer lists: mostly shared ids, some regional editions."""
+    region_flyers, next_id = {}, 50_000
+    for r in range(n_regions):
+        flyers = []
+        for flyer in base_flyers:
+            if r == 0 or rng.random() < SHARED_FLYER_RATE:
+                flyers.append(flyer)
+            else:
+                flyers.append(dict(flyer, id=next_id))
+                next_id += 1
+        region_flyers[f"T{r:02d}R{r:02d}"] = flyers
+    return region_flyers
+
+
+def run(n_regions, latency, base_flyers, base_items, rng):
+    import get_deals
+
+    region_flyers = simulated_regions(n_regions, base_flyers, rng)
+    calls = {"list": 0, "items": 0}
+
+    def fake_flyer_list(postal_code):
+        calls["list"] += 1
+        time.sleep(latency)
+        return region_flyers[postal_code]
+
+    def fake_flyer_items(flyer_id):
+        calls["items"] += 1
+        time.sleep(latency)
+        # Regional editions reuse the items of the flyer they replace
+        return base_items.get(flyer_id) or next(iter(base_items.values()))
+
+    get_deals.get_active_flyers = fake_flyer_list
+    get_deals.get_flyer_items = fake_flyer_items
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        listed = get_deals.list_region_flyers(list(region_flyers))
+        list_seconds = time.perf_counter() - start
+        flyers = get_deals.collapse_region_flyers(listed)
+        start = time.perf_counter()
+        deals = get_deals.extract_deals(flyers)
+        fetch_seconds = time.perf_counter() - start
+
+    naive_fetches = sum(len(f["regions"]) for f in flyers)
+    return {
+        "regions": n_regions,
+        "list_seconds": list_seconds,
+        "fetch_seconds": fetch_seconds,
+        "flyer_fetches": calls["items"],
+        "naive_fetches": naive_fetches,
+        "rows": len(deals),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report multi-region scrape scaling with simulated latency.")
+    parser.add_argument("--regions", default="1,2,4,8,16")
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated seconds per Flipp request")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    seed = load_seed()
+    base_flyers, base_items = synthetic_flyers(build_catalogue(seed, len(seed), rng))
+
+    print(f"{'regions':>7} {'list s':>8} {'fetch s':>8} {'fetches':>8} {'naive':>6} {'saved':>6} {'rows':>7}")
+    for n in (int(x) for x in args.regions.split(",")):
+        r = run(n, args.latency, base_flyers, base_items, rng)
+        saved = 1 - r["flyer_fetches"] / r["naive_fetches"] if r["naive_fetches"] else 0
+        print(f"{r['regions']:>7} {r['list_seconds']:>8.2f} {r['fetch_seconds']:>8.2f} "
+              f"{r['flyer_fetches']:>8} {r['naive_fetches']:>6} {saved:>6.0%} {r['rows']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Load test for main.py's /search and /stats result cache.
+
+Replays a skewed (Zipf) mix of searches drawn from words in the item names,
+plus a share of /stats calls, once with the cache disabled and once with it
+on, and reports throughput, latency percentiles and the cache's hit/byte
+stats. By default the handlers are called directly; --http goes through
+FastAPI's TestClient so routing, middleware and the response are included.
+
+Usage:
+    python -m benchmarks.result_cache                        # the real history
+    python -m benchmarks.result_cache --synthetic 1M --requests 2000
+    python -m benchmarks.result_cache --http
+"""
+import argparse
+import contextlib
+import io
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import Counter
+
+import numpy as np
+
+from benchmarks.synthetic import generate_history, parse_size
+from result_cache import ResultCache
+
+
+def query_pool(items, n_distinct):
+    """Most common words in the item names, most popular first."""
+    words = Counter(w for name in items for w in re.findall(r"[a-z]{3,}", str(name).lower()))
+    return [w for w, _ in words.most_common(n_distinct)]
+
+
+def zipf_workload(pool, n_requests, exponent, stats_share, random_state=0):
+    rng = np.random.default_rng(random_state)
+    weights = 1.0 / np.arange(1, len(pool) + 1) ** exponent
+    picks = rng.choice(len(pool), size=n_requests, p=weights / weights.sum())
+    is_stats = rng.random(n_requests) < stats_share
+    return [None if s else pool[i] for i, s in zip(picks, is_stats)]
+
+
+def replay(api, workload, client=None):
+    latencies = np.empty(len(workload))
+    start = time.perf_counter()
+    for i, q in enumerate(workload):
+        t = time.perf_counter()
+        if client is not None:
+            client.get("/stats") if q is None else client.get("/search", params={"q": q})
+        else:
+            api.get_stats() if q is None else api.search_items(q)
+        latencies[i] = time.perf_counter() - t
+    return time.perf_counter() - start, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of /search and /stats with and without the result cache.")
+    parser.add_argument("--synthetic", help="Serve a synthetic history of this size instead, e.g. 1M")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--distinct", type=int, default=300, help="Distinct search terms in the pool")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Popularity skew (higher = fewer hot queries)")
+    parser.add_argument("--stats-share", type=float, default=0.1, help="Fraction of requests that hit /stats")
+    parser.add_argument("--http", action="store_true", help="Go through TestClient instead of calling handlers")
+    args = parser.parse_args()
+
+    old_cwd, workdir = os.getcwd(), None
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            import main as api
+            if args.synthetic:
+                history = generate_history(parse_size(args.synthetic))
+                workdir = tempfile.mkdtemp(prefix="grocery_cache_")
+                os.chdir(workdir)   # main.py uses paths relative to the working directory
+                history.to_csv(api.csv_file, index=False)
+                api.refresh_data()
+
+        client = None
+        if args.http:
+            from fastapi.testclient import TestClient
+            client = TestClient(api.app)
+
+        pool = query_pool(api.current.dataset["Item"].to_pylist(), args.distinct)
+        workload = zipf_workload(pool, args.requests, args.zipf, args.stats_share)
+        top = ", ".join(f"{q or '/stats'} x{n}" for q, n in Counter(workload).most_common(3))
+        print(f"{api.current.dataset.num_rows:,} rows, {len(workload):,} requests over {len(set(workload))} distinct queries (top: {top})")
+
+        results = {}
+        for name, cache in (("no cache", ResultCache(max_bytes=0)), ("cache", ResultCache())):
+            api.result_cache = cache
+            seconds, latencies = replay(api, workload, client)
+            results[name] = seconds
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+            print(f"   {name:<9} {len(workload) / seconds:9.0f} req/s   p50 {p50:7.3f}ms   p99 {p99:7.3f}ms")
+        print(f"   speedup   {results['no cache'] / results['cache']:.1f}x")
+        print(f"   stats     {cache.stats()}")
+    finally:
+        os.chdir(old_cwd)
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Pipeline benchmark suite.
+
+Times and memory-profiles each stage that rescans the history against a
+synthetic dataset (see benchmarks/synthetic.py). Flipp and Gemini calls are
+stubbed, so runs are offline and repeatable.
+
+Usage:
+    python -m benchmarks.run --sizes 10k,100k
+    python -m benchmarks.run --sizes 10k,100k --save-baseline
+    python -m benchmarks.run --sizes 10k,100k --fail-on-regression
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import runpy
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from benchmarks.synthetic import generate_history, load_seed, build_catalogue, synthetic_flyers, parse_size
+from columnar import ARROW_FILE, write_arrow
+from aggregates import PriceAggregates, write_aggregates
+import local_classifier
+
+BASELINE_FILE = os.path.join(REPO_DIR, "benchmarks", "baseline.json")
+DEFAULT_SIZES = "10k,100k,1M,10M"
+REGRESSION_THRESHOLD = 0.25   # Flag stages more than 25% slower than baseline
+
+
+# --- STUBS (no network, no LLM) ---
+def install_stubs(get_deals, flyers, flyer_items):
+    from classifier import GroceryItem
+
+    def fake_categorize(raw_items):
+        return [GroceryItem(original_name=n, clean_name=n, category="Other", is_deal=False) for n in raw_items]
+
+    get_deals.get_active_flyers = lambda postal_code: flyers
+    get_deals.get_flyer_items = lambda flyer_id: flyer_items.get(flyer_id, [])
+    get_deals.categorize_groceries = fake_categorize
+
+
+# --- STAGES ---
+# Each stage is (name, setup, run). setup() prepares state untimed and
+# returns the argument passed to run().
+def build_stages(workdir, history_csv, flyers, flyer_items):
+    import get_deals
+    import main as api
+    import dashboard
+
+    install_stubs(get_deals, flyers, flyer_items)
+    # The local classifier is trained offline; train it once here so stages time scoring, not training
+    local_classifier.train(os.path.join(REPO_DIR, "seton_grocery_history.csv"), local_classifier.MODEL_FILE)
+
+    def fresh_history():
+        shutil.copy(history_csv, os.path.join(workdir, get_deals.HISTORY_FILE))
+
+    def fresh_deals():
+        fresh_history()
+        return get_deals.extract_deals(get_deals.select_flyers(flyers))
+
+    def classified_deals():
+        return get_deals.classify_deals(fresh_deals())
+
+    def cleaned():
+        fresh_history()
+        get_deals.run_post_processing_cleaner()
+
+    def api_data():
+        fresh_history()
+        write_arrow(get_deals.HISTORY_FILE, ARROW_FILE)   # get_deals.py builds this after each merge
+
+    def set_api_data():
+        api_data()
+        api.current = api.ApiData(api.data_version(), api.load_data(get_deals.HISTORY_FILE), None)
+        api.result_cache.clear()   # Time the search itself, not a cache hit from the last repeat
+
+    def aggregates_written():
+        set_api_data()
+        write_aggregates(api.current.dataset)
+
+    def dashboard_data():
+        cleaned()
+        dashboard.load_data.clear()
+        return dashboard.load_data()
+
+    return [
+        ("scrape_extract", lambda: get_deals.select_flyers(flyers), get_deals.extract_deals),
+        ("classify_cache", fresh_deals, get_deals.classify_deals),
+        ("history_merge", classified_deals, get_deals.save_history),
+        ("cleaner", fresh_history, lambda _: get_deals.run_post_processing_cleaner()),
+        ("api_load", api_data, lambda _: api.load_data(get_deals.HISTORY_FILE)),
+        ("api_search", set_api_data, lambda _: api.search_items("milk")),
+        ("api_stats", set_api_data, lambda _: api.get_stats()),
+        ("api_aggregates", set_api_data, lambda _: write_aggregates(api.current.dataset)),
+        ("api_aggregates_open", aggregates_written, lambda _: PriceAggregates.open()),
+        ("dashboard_load", cleaned, lambda _: (dashboard.load_data.clear(), dashboard.load_data())),
+        ("dashboard_item_stats", dashboard_data, lambda df: dashboard.get_item_stats("Milk", df)),
+        ("fix_database", fresh_history, lambda _: runpy.run_path(os.path.join(REPO_DIR, "fix_database.py"))),
+    ]
+
+
+@contextlib.contextmanager
+def quiet():
+    """Hide pipeline progress prints and streamlit's bare-mode warnings."""
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        yield
+
+
+def measure(setup, run, repeat, profile_memory):
+    """Best-of-N wall time, plus tracemalloc peak from a separate pass."""
+    best = float("inf")
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        run(arg)
+        best = min(best, time.perf_counter() - start)
+
+    peak_mb = None
+    if profile_memory:
+        arg = setup()
+        tracemalloc.start()
+        run(arg)
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return best, peak_mb
+
+
+def run_size(n_rows, repeat, profile_memory, only=None):
+    seed = load_seed(os.path.join(REPO_DIR, "seton_grocery_history.csv"))
+    catalogue = build_catalogue(seed, n_rows, np.random.default_rng(0))
+    flyers, flyer_items = synthetic_flyers(catalogue)
+
+    results = {}
+    old_cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="grocery_bench_")
+    try:
+        history_csv = os.path.join(workdir, "synthetic_history.csv")
+        generate_history(n_rows, seed=seed).to_csv(history_csv, index=False)
+        results["_history_mb"] = round(os.path.getsize(history_csv) / 1e6, 2)
+
+        # All modules use paths relative to the working directory
+        os.chdir(workdir)
+        os.environ.setdefault("GEMINI_API_KEY", "benchmark-stub")
+        with quiet():
+            stages = build_stages(workdir, history_csv, flyers, flyer_items)
+
+        for name, setup, run in stages:
+            if only and name not in only:
+                continue
+            with quiet():
+                seconds, peak_mb = measure(setup, run, repeat, profile_memory)
+            results[name] = {"seconds": round(seconds, 4)}
+            if peak_mb is not None:
+                results[name]["peak_mb"] = round(peak_mb, 2)
+            mem = f"{peak_mb:9.1f} MB" if peak_mb is not None else ""
+            print(f"   {name:<22} {seconds:9.3f} s {mem}")
+    finally:
+        os.chdir(old_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+# --- BASELINES ---
+def load_baseline():
+    if not os.path.exists(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE) as f:
+        return json.load(f)
+
+
+def save_baseline(report):
+    baseline = load_baseline()
+    baseline.update(report)
+    with open(BASELINE_FILE, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+    print(f"\n✅ Baseline saved to {BASELINE_FILE}")
+
+
+def find_regressions(report, baseline, threshold=REGRESSION_THRESHOLD):
+    regressions = []
+    for size, stages in report.items():
+        for stage, result in stages.items():
+            before = baseline.get(size, {}).get(stage)
+            if not isinstance(result, dict) or not before:
+                continue
+            for metric in ("seconds", "peak_mb"):
+                old, new = before.get(metric), result.get(metric)
+                if old and new and new > old * (1 + threshold):
+                    regressions.append(f"{size} {stage} {metric}: {old} -> {new} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the grocery pipeline on synthetic history.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Comma-separated row counts (default {DEFAULT_SIZES})")
+    parser.add_argument("--stages", default="", help="Comma-separated stage names to run (default all)")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per stage; best is kept")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Write results to {BASELINE_FILE}")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit 1 if any stage regressed")
+    parser.add_argument("--json", help="Also write the report to this path")
+    args = parser.parse_args()
+
+    only = set(filter(None, args.stages.split(",")))
+    report = {}
+    for size in args.sizes.split(","):
+        print(f"\n>> {size} rows")
+        report[size] = run_size(parse_size(size), args.repeat, not args.no_memory, only)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    regressions = find_regressions(report, load_baseline(), args.threshold)
+    if regressions:
+        print("\n[!] Regressions vs baseline:")
+        for line in regressions:
+            print(f"   {line}")
+    if args.save_baseline:
+        save_baseline(report)
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
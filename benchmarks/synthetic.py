@@ -0,0 +1,114 @@
+"""
+Synthetic history generator for benchmarking.
+
+Rows follow the schema of seton_grocery_history.csv and are sampled from the
+real file, so store mix, categories, names and price levels look like the
+scraper's output. Larger sizes add name variants and more weekly scrapes
+so the catalogue and the date range grow the way a long-lived history would.
+"""
+import argparse
+import datetime
+import math
+
+import numpy as np
+import pandas as pd
+
+SEED_FILE = "seton_grocery_history.csv"
+COLUMNS = [
+    "Date", "Store", "Item", "Price_Text", "Price_Value", "Valid_Until",
+    "Category", "Is_Deal", "Original_Name", "recorded_at", "Sub_Category"
+]
+ROWS_PER_SCRAPE = 1100   # Roughly one weekly run across all six stores
+FIRST_SCRAPE = pd.Timestamp("2025-11-19")
+
+
+def parse_size(text):
+    """'10k' -> 10000, '1M' -> 1000000."""
+    text = str(text).strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+
+def load_seed(path=SEED_FILE):
+    seed = pd.read_csv(path)
+    seed = seed[seed["Price_Value"] > 0].reset_index(drop=True)
+    return seed
+
+
+def build_catalogue(seed, n_rows, rng):
+    """Product catalogue that grows ~sqrt(rows) beyond the real item count."""
+    base = seed.drop_duplicates(subset=["Store", "Original_Name"]).reset_index(drop=True)
+    growth = max(1, int(math.sqrt(n_rows / len(seed))))
+    if growth == 1:
+        return base
+
+    picks = rng.integers(0, len(base), size=len(base) * (growth - 1))
+    extra = base.iloc[picks].reset_index(drop=True)
+    variant = pd.Series(np.arange(len(extra)) // len(base) + 2).astype(str)
+    extra["Original_Name"] = extra["Original_Name"] + " #" + variant
+    extra["Item"] = extra["Item"] + " #" + variant
+    extra["Price_Value"] = (extra["Price_Value"] * rng.lognormal(0, 0.25, len(extra))).round(2)
+    return pd.concat([base, extra], ignore_index=True)
+
+
+def generate_history(n_rows, seed=None, random_state=42):
+    """Return a DataFrame of n_rows synthetic history records."""
+    rng = np.random.default_rng(random_state)
+    seed = load_seed() if seed is None else seed
+    catalogue = build_catalogue(seed, n_rows, rng)
+
+    rows = catalogue.iloc[rng.integers(0, len(catalogue), size=n_rows)].reset_index(drop=True)
+
+    # Weekly scrapes, oldest first, like the real file
+    n_scrapes = max(1, math.ceil(n_rows / ROWS_PER_SCRAPE))
+    scrape_idx = np.sort(rng.integers(0, n_scrapes, size=n_rows))
+    dates = FIRST_SCRAPE + pd.to_timedelta(scrape_idx * 7, unit="D")
+    valid = dates + pd.to_timedelta(rng.integers(5, 8, size=n_rows), unit="D")
+
+    # Most sightings repeat the catalogue price, some are on sale
+    jitter = np.where(rng.random(n_rows) < 0.7, 1.0, rng.lognormal(-0.1, 0.15, n_rows))
+    price = np.maximum((rows["Price_Value"].to_numpy() * jitter).round(2), 0.25)
+
+    is_deal = seed["Is_Deal"].dropna().to_numpy()
+    out = pd.DataFrame({
+        "Date": dates.strftime("%Y-%m-%d"),
+        "Store": rows["Store"],
+        "Item": rows["Item"],
+        "Price_Text": pd.Series(price).map("${:.2f}".format),
+        "Price_Value": price,
+        "Valid_Until": valid.strftime("%Y-%m-%d"),
+        "Category": rows["Category"],
+        "Is_Deal": is_deal[rng.integers(0, len(is_deal), size=n_rows)],
+        "Original_Name": rows["Original_Name"],
+        "recorded_at": "",
+        "Sub_Category": rows["Sub_Category"],
+    })
+    return out[COLUMNS]
+
+
+def synthetic_flyers(catalogue, n_items=1100, random_state=7):
+    """Fake Flipp payloads: (flyer list, {flyer_id: items}) for one scrape."""
+    rng = np.random.default_rng(random_state)
+    picks = catalogue.iloc[rng.integers(0, len(catalogue), size=n_items)]
+    valid_to = (datetime.date.today() + datetime.timedelta(days=6)).isoformat()
+    flyers, items = [], {}
+    for i, (store, group) in enumerate(picks.groupby("Store")):
+        flyer_id = 1000 + i
+        flyers.append({"id": flyer_id, "merchant": store, "name": "Weekly Flyer", "valid_to": valid_to})
+        items[flyer_id] = [
+            {"name": name, "price": f"${price:.2f}", "valid_to": valid_to}
+            for name, price in zip(group["Original_Name"], group["Price_Value"])
+        ]
+    return flyers, items
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic grocery history CSV.")
+    parser.add_argument("size", help="Row count, e.g. 10k, 100k, 1M, 10M")
+    parser.add_argument("-o", "--output", default="synthetic_history.csv")
+    parser.add_argument("--random-state", type=int, default=42)
+    args = parser.parse_args()
+
+    df = generate_history(parse_size(args.size), random_state=args.random_state)
+    df.to_csv(args.output, index=False)
+    print(f"✅ Wrote {len(df)} rows to {args.output}")
@@ -0,0 +1,73 @@
+"""
+Watchlist matching cost as the number of watches grows.
+
+Matches one scrape's worth of deals (~1100 rows) against N synthetic
+watches built from real item-name tokens, with the inverted-index matcher
+and with a naive check-every-watch loop for comparison. Match time tracks
+the number of alerts produced rather than the number of watches.
+
+Usage:
+    python -m benchmarks.watchlist --watches 10,100,1000,10000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import load_seed
+from watchlist import WatchMatcher, add_watch, tokenize
+
+
+def synthetic_watches(n, seed, rng):
+    vocab = sorted(set().union(*(tokenize(name) for name in seed["Item"].unique())))
+    stores = seed["Store"].unique().tolist()
+    watches = []
+    for _ in range(n):
+        terms = " ".join(rng.choice(vocab, size=rng.integers(1, 3), replace=False))
+        store = stores[rng.integers(len(stores))] if rng.random() < 0.3 else None
+        max_price = round(float(rng.uniform(2, 15)), 2) if rng.random() < 0.5 else None
+        add_watch(watches, terms, store=store, max_price=max_price)
+    return watches
+
+
+def naive_match(watches, deals):
+    parsed = [(w, tokenize(w["terms"])) for w in watches]
+    hits = 0
+    for deal in deals:
+        keys = tokenize(deal["Item"]) | tokenize(deal["Original_Name"])
+        for watch, terms in parsed:
+            if terms <= keys and WatchMatcher._passes_filters(watch, deal):
+                hits += 1
+    return hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark watchlist matching against one scrape of deals.")
+    parser.add_argument("--watches", default="10,100,1000,10000")
+    parser.add_argument("--naive-limit", type=int, default=10000, help="Skip the naive loop above this many watches")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    seed = load_seed()
+    deals = seed.sample(1100, random_state=1).to_dict("records")
+
+    print(f"{'watches':>8} {'build ms':>9} {'match ms':>9} {'naive ms':>9} {'alerts':>7}")
+    for n in (int(x) for x in args.watches.split(",")):
+        watches = synthetic_watches(n, seed, rng)
+        start = time.perf_counter()
+        matcher = WatchMatcher(watches)
+        built = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        alerts = sum(len(matcher.match(d)) for d in deals)
+        indexed = (time.perf_counter() - start) * 1000
+
+        naive = "-"
+        if n <= args.naive_limit:
+            start = time.perf_counter()
+            assert naive_match(watches, deals) == alerts
+            naive = f"{(time.perf_counter() - start) * 1000:.1f}"
+        print(f"{n:>8} {built:>9.1f} {indexed:>9.1f} {naive:>9} {alerts:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 import os
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
-from google import genai
 from typing import List, Literal
+from lazy_imports import lazy_import
+
+# Only imported when a batch actually goes to Gemini
+genai = lazy_import("google.genai")
 
 # Load environment variables
 load_dotenv()
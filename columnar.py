@@ -0,0 +1,177 @@
+"""
+Memory-mapped columnar copy of the history for the API.
+
+get_deals.py writes seton_grocery_history.arrow (Arrow IPC) next to the CSV.
+main.py memory-maps it, so every uvicorn worker reads the same pages from
+the OS page cache instead of holding its own parsed copy. Types are native:
+Date is a date, Price_Value a float, Is_Deal a bool. Low-cardinality text is
+dictionary-encoded and missing values stay null.
+
+The cleaner's output for the dashboard is also kept here as a Parquet dataset
+(clean_grocery_data/date=YYYY-MM-DD/...), partitioned by scrape date, so
+readers can load only the columns and the date range they need.
+"""
+import datetime
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
+import pyarrow.ipc as ipc
+
+from price_episodes import LEGACY_REGION
+
+ARROW_FILE = 'seton_grocery_history.arrow'
+CLEAN_DATASET_DIR = 'clean_grocery_data'   # Parquet, one date=YYYY-MM-DD/ partition per scrape
+
+HISTORY_SCHEMA = pa.schema([
+    ('Date', pa.date32()),
+    ('Store', pa.dictionary(pa.int32(), pa.string())),
+    ('Item', pa.string()),
+    ('Price_Text', pa.string()),
+    ('Price_Value', pa.float64()),
+    ('Valid_Until', pa.string()),        # Mixed date / ISO timestamp strings from Flipp
+    ('Category', pa.dictionary(pa.int32(), pa.string())),
+    ('Is_Deal', pa.bool_()),
+    ('Original_Name', pa.string()),
+    ('recorded_at', pa.string()),
+    ('Sub_Category', pa.dictionary(pa.int32(), pa.string())),
+    ('Region', pa.dictionary(pa.int32(), pa.string())),
+])
+_LABEL = pa.dictionary(pa.int32(), pa.string())
+CLEAN_SCHEMA = pa.schema([
+    ('date', pa.date32()),
+    ('store', _LABEL),
+    ('item', pa.string()),
+    ('Price_Text', pa.string()),
+    ('price', pa.float64()),
+    ('valid_until', pa.date32()),        # Day only; the CSV export keeps Flipp's raw string
+    ('category', _LABEL),
+    ('display_category', _LABEL),
+    ('sub_category', _LABEL),
+    ('Is_Deal', pa.bool_()),
+    ('Original_Name', pa.string()),
+    ('recorded_at', pa.string()),
+    ('region', _LABEL),
+    ('original_price', pa.float64()),
+    ('savings_pct', pa.float64()),
+    ('prior_sightings', pa.int32()),     # Rolling baseline from deal_scores.py
+    ('baseline_price', pa.float64()),
+    ('price_percentile', pa.float64()),
+    ('deal_score', pa.float64()),
+])
+_DATE_PARTITIONING = ds.partitioning(pa.schema([('date', pa.date32())]), flavor='hive')
+# Is_Deal was written by several pandas/AI versions over time
+_TRUE_VALUES = ['True', 'TRUE', 'true', '1']
+_FALSE_VALUES = ['False', 'FALSE', 'false', '0']
+
+
+def read_history_csv(csv_path):
+    """Parse the history CSV straight into a typed Arrow table."""
+    convert = pa_csv.ConvertOptions(
+        column_types={f.name: pa.string() if pa.types.is_dictionary(f.type) else f.type for f in HISTORY_SCHEMA},
+        true_values=_TRUE_VALUES,
+        false_values=_FALSE_VALUES,
+        strings_can_be_null=True,
+    )
+    table = pa_csv.read_csv(csv_path, convert_options=convert)
+
+    columns = []
+    for field in HISTORY_SCHEMA:
+        if field.name in table.column_names:
+            col = table[field.name]
+        else:
+            col = pa.nulls(table.num_rows, pa.string() if pa.types.is_dictionary(field.type) else field.type)
+        if field.name == 'Region':
+            col = pc.fill_null(col.cast(pa.string()), LEGACY_REGION)
+        if pa.types.is_dictionary(field.type):
+            col = pc.dictionary_encode(col).cast(field.type)
+        columns.append(col)
+    return pa.Table.from_arrays(columns, schema=HISTORY_SCHEMA)
+
+
+def write_arrow(csv_path, arrow_path=ARROW_FILE):
+    """(Re)build the Arrow file atomically so running workers never see a partial file."""
+    table = read_history_csv(csv_path)
+    tmp_path = f"{arrow_path}.tmp{os.getpid()}"
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, arrow_path)
+    return table
+
+
+def open_dataset(csv_path, arrow_path=ARROW_FILE):
+    """Memory-map the Arrow file, rebuilding it first if it's missing or older than the CSV."""
+    stale = not os.path.exists(arrow_path) or (
+        os.path.exists(csv_path) and os.path.getmtime(csv_path) > os.path.getmtime(arrow_path)
+    )
+    if stale:
+        write_arrow(csv_path, arrow_path)
+    source = pa.memory_map(arrow_path, 'r')
+    return ipc.open_file(source).read_all()
+
+
+# --- Clean dataset (Parquet) ---
+def _clean_column(df, field):
+    if field.name not in df.columns:
+        return pa.nulls(len(df), pa.string() if pa.types.is_dictionary(field.type) else field.type)
+    col = df[field.name]
+    if pa.types.is_date32(field.type):
+        dates = pd.to_datetime(col.astype(str).str[:10], format='%Y-%m-%d', errors='coerce')
+        return pa.array(dates, type=pa.timestamp('ns'), from_pandas=True).cast(pa.date32())
+    if pa.types.is_floating(field.type):
+        return pa.array(pd.to_numeric(col, errors='coerce'), type=field.type, from_pandas=True)
+    if pa.types.is_integer(field.type):
+        return pa.array(pd.to_numeric(col, errors='coerce').astype('Int64'), from_pandas=True).cast(field.type)
+    if pa.types.is_boolean(field.type):
+        flags = {v.lower(): True for v in _TRUE_VALUES} | {v.lower(): False for v in _FALSE_VALUES}
+        return pa.array(col.astype(str).str.lower().map(flags), type=field.type, from_pandas=True)
+    return pa.array(col.astype(str).where(col.notna()), type=pa.string(), from_pandas=True)
+
+
+def write_clean_dataset(df, path=CLEAN_DATASET_DIR):
+    """Replace the Parquet copy of the cleaner's DataFrame, one partition per scrape date."""
+    columns = []
+    for field in CLEAN_SCHEMA:
+        col = _clean_column(df, field)
+        if pa.types.is_dictionary(field.type):
+            col = pc.dictionary_encode(col).cast(field.type)
+        columns.append(col)
+    table = pa.Table.from_arrays(columns, schema=CLEAN_SCHEMA)
+
+    # Build next to the live copy and swap directories, so readers never see a half-written dataset
+    tmp_path, old_path = f"{path}.tmp{os.getpid()}", f"{path}.old{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    ds.write_dataset(table, tmp_path, format='parquet', partitioning=_DATE_PARTITIONING)
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return table
+
+
+def load_clean_dataset(path=CLEAN_DATASET_DIR, columns=None, since=None, until=None):
+    """
+    Clean rows as a DataFrame, reading only `columns` and scrape dates in [since, until].
+    Date bounds prune whole partitions, so 'last 90 days' never opens older files.
+    """
+    dataset = ds.dataset(path, format='parquet', partitioning=_DATE_PARTITIONING)
+    condition = ds.scalar(True)
+    if since is not None:
+        condition &= ds.field('date') >= _as_date(since)
+    if until is not None:
+        condition &= ds.field('date') <= _as_date(until)
+    return dataset.to_table(columns=columns, filter=condition).to_pandas(date_as_object=False)
+
+
+def _as_date(value):
+    # Accepts a date, Timestamp or 'YYYY-MM-DD...' string
+    return datetime.date.fromisoformat(str(value)[:10])
+
+
+def dataset_bytes(path=CLEAN_DATASET_DIR):
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
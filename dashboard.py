@@ -1,18 +1,31 @@
 import streamlit as st
 import pandas as pd
-import google.generativeai as genai
-import plotly.express as px
 import os
 import re
 from datetime import timedelta
 from dotenv import load_dotenv
+from columnar import CLEAN_DATASET_DIR, load_clean_dataset
+from lazy_imports import lazy_import
+
+# Heavy libraries load on first use (first Analyze click / first chart), not at startup
+genai = lazy_import("google.generativeai")
+px = lazy_import("plotly.express")
 
 # --- CONFIGURATION ---
 load_dotenv()
 PAGE_TITLE = "Calgary Grocery Hub"
 
 # FILES
-DATA_FILES = ["clean_grocery_data.csv", "seton_grocery_history.csv"]
+DATA_FILES = ["clean_grocery_data.csv", "seton_grocery_history.csv"]   # CSV fallbacks if the Parquet dataset is missing
+DATA_COLUMNS = ['date', 'store', 'item', 'price', 'valid_until', 'category', 'display_category', 'sub_category', 'savings_pct',
+                'baseline_price', 'price_percentile', 'deal_score', 'region', 'Original_Name']
+HISTORY_WINDOWS = {"All history": None, "Last 365 days": 365, "Last 90 days": 90}
+DEFAULT_REGION = "T3M1M9"   # Same as get_deals.POSTAL_CODE
+# Rows fan out per region, so the same sighting can appear once per region
+SIGHTING_KEY = ['date', 'store', 'Original_Name', 'price']
+
+# DEAL FLAGS (deal_score = % below the item's recent median price at that store, see deal_scores.py)
+GOOD_DEAL_SCORE = 15
 
 # AI MODEL
 AI_MODEL_NAME = "gemini-2.0-flash" 
@@ -26,7 +39,15 @@ if not GEMINI_API_KEY:
 
 # --- DATA LOADING ---
 @st.cache_data
-def load_data():
+def load_data(history_days=None):
+    since = pd.Timestamp.now().floor('D') - timedelta(days=history_days) if history_days else None
+
+    # Typed Parquet from the cleaner: only the columns we use, only the partitions in the window
+    if os.path.isdir(CLEAN_DATASET_DIR):
+        df = load_clean_dataset(CLEAN_DATASET_DIR, columns=DATA_COLUMNS, since=since)
+        df['region'] = df['region'].astype(object).fillna(DEFAULT_REGION)
+        return df[df['price'] > 0.01]
+
     file_path = next((f for f in DATA_FILES if os.path.exists(f)), None)
     if not file_path: return pd.DataFrame()
     
@@ -37,7 +58,7 @@ def load_data():
         'Item': 'item', 'Store': 'store', 'Category': 'category', 
         'Price_Value': 'price', 'Date': 'date', 'Sub_Category': 'sub_category',
         'Original_Price': 'original_price', 'Valid_Until': 'valid_until',
-        'display_category': 'display_category'
+        'display_category': 'display_category', 'Region': 'region'
     })
     
     # Type Conversion
@@ -49,6 +70,8 @@ def load_data():
         df['date'] = pd.to_datetime(df['date'], errors='coerce')
     if 'valid_until' in df.columns:
         df['valid_until'] = pd.to_datetime(df['valid_until'], errors='coerce')
+    if since is not None:
+        df = df[df['date'] >= since]
 
     # Calculate Savings
     if 'original_price' in df.columns:
@@ -59,13 +82,18 @@ def load_data():
 
     if 'display_category' not in df.columns:
         df['display_category'] = df['category']
+    df['region'] = df['region'].astype(object).fillna(DEFAULT_REGION) if 'region' in df.columns else DEFAULT_REGION
+    for col in ('baseline_price', 'price_percentile', 'deal_score'):
+        if col not in df.columns:
+            df[col] = float('nan')
         
     return df
 
 # --- ANALYSIS ENGINE ---
 def get_item_stats(item_name, df):
     """Uses the FULL history for context."""
-    history = df[df['item'].str.contains(item_name, case=False, regex=False)].copy()
+    history = df[df['item'].str.contains(item_name, case=False, regex=False)]
+    history = history.drop_duplicates(subset=[c for c in SIGHTING_KEY if c in history.columns])
     if history.empty: return None
     
     return {
@@ -87,13 +115,21 @@ def run_ai_analysis(item_row, stats):
 
 # --- MAIN APP ---
 def main():
-    df_master = load_data() 
+    with st.sidebar:
+        history_window = st.selectbox("History Window", list(HISTORY_WINDOWS))
+    df_master = load_data(HISTORY_WINDOWS[history_window])
     today = pd.Timestamp.now().floor('D')
 
     if df_master.empty:
         st.error("No data found.")
         return
 
+    # One region at a time, otherwise flyers shared between regions show up once per region
+    regions = sorted(df_master['region'].unique())
+    with st.sidebar:
+        region = st.selectbox("Region", regions, index=regions.index(DEFAULT_REGION) if DEFAULT_REGION in regions else 0)
+    df_master = df_master[df_master['region'] == region]
+
     # FLYER ISOLATION
     latest_dates = df_master.groupby('store')['date'].max().reset_index()
     latest_dates.columns = ['store', 'latest_flyer_date']
@@ -115,7 +151,7 @@ def main():
             list_view_df = df_master.copy()
 
         st.divider()
-        sort_option = st.selectbox("Sort By", ["Expiring Soon", "Savings (High to Low)", "Price (Low to High)", "Alphabetical"])
+        sort_option = st.selectbox("Sort By", ["Expiring Soon", "Deal Score (Best First)", "Savings (High to Low)", "Price (Low to High)", "Alphabetical"])
         search_query = st.text_input("Search Flyer")
         
         cats = ["All"] + sorted(list_view_df['display_category'].dropna().unique().tolist())
@@ -150,6 +186,8 @@ def main():
             # Sorting logic
             if sort_option == "Expiring Soon":
                 filtered_df = filtered_df.sort_values(by='valid_until', ascending=True)
+            elif sort_option == "Deal Score (Best First)":
+                filtered_df = filtered_df.sort_values(by='deal_score', ascending=False, na_position='last')
             elif sort_option == "Savings (High to Low)":
                 filtered_df = filtered_df.sort_values(by='savings_pct', ascending=False)
             elif sort_option == "Price (Low to High)":
@@ -172,6 +210,8 @@ def main():
                             st.caption(f"{status_icon} {date_str} | {row.get('sub_category','')}")
                         with c2:
                             st.markdown(f"**${row['price']:.2f}**" + (f" (🔥 {int(row['savings_pct'])}%)" if row['savings_pct'] > 0 else ""))
+                            if row['deal_score'] >= GOOD_DEAL_SCORE:
+                                st.caption(f"📉 {row['deal_score']:.0f}% below usual ${row['baseline_price']:.2f}")
                         with c3:
                             if st.button("Analyze", key=f"btn_{row.name}"):
                                 stats = get_item_stats(row['item'], df_master)
@@ -0,0 +1,85 @@
+"""
+Persistent record of flyers already ingested into the history.
+
+Each entry is keyed by Flipp flyer id and stores merchant, name, the regions
+(postal codes) it was ingested for, validity window, item count and ingest
+time. get_deals.py skips flyers that are in
+the manifest and still valid, so back-to-back runs don't re-download and
+re-classify the same items. A flyer with no usable end date counts as valid
+for UNKNOWN_VALIDITY_DAYS after it was ingested. Delete the file (or run with --force) if the
+history CSV is rebuilt from scratch.
+"""
+import datetime
+import json
+import os
+
+MANIFEST_FILE = 'flyer_manifest.json'
+KEEP_EXPIRED_DAYS = 30   # Prune entries this long after their flyer ended
+UNKNOWN_VALIDITY_DAYS = 7   # Flyers with no usable valid_to count as ending this long after ingest
+
+
+def _flyer_date(value):
+    """Flipp dates look like '2025-12-18T00:00:00-07:00'; keep the date part."""
+    if not value:
+        return None
+    try:
+        return datetime.date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def _expires(entry):
+    """Last day the entry counts as current (None if neither valid_to nor ingested_at parse)."""
+    valid_to = _flyer_date(entry.get('valid_to'))
+    if valid_to is not None:
+        return valid_to
+    ingested = _flyer_date(entry.get('ingested_at'))
+    return ingested + datetime.timedelta(days=UNKNOWN_VALIDITY_DAYS) if ingested else None
+
+
+class FlyerManifest:
+    def __init__(self, path=MANIFEST_FILE):
+        self.path = path
+        self.flyers = {}
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.flyers = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"   [!] Could not read {path}, starting fresh: {e}")
+
+    def is_fresh(self, flyer, today=None):
+        """True if this flyer was ingested for all its regions and hasn't expired yet."""
+        entry = self.flyers.get(str(flyer.get('id')))
+        if not entry:
+            return False
+        if not set(flyer.get('regions') or []) <= set(entry.get('regions') or []):
+            return False
+        expires = _expires(entry)
+        today = today or datetime.date.today()
+        return expires is not None and expires >= today
+
+    def record(self, flyer, item_count, regions=None):
+        previous = self.flyers.get(str(flyer['id']), {}).get('regions') or []
+        self.flyers[str(flyer['id'])] = {
+            'regions': sorted(set(previous) | set(regions or [])),
+            'merchant': flyer.get('merchant'),
+            'name': flyer.get('name'),
+            'valid_from': flyer.get('valid_from'),
+            'valid_to': flyer.get('valid_to'),
+            'item_count': item_count,
+            'ingested_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        }
+
+    def prune(self, today=None):
+        today = today or datetime.date.today()
+        cutoff = today - datetime.timedelta(days=KEEP_EXPIRED_DAYS)
+        stale = [fid for fid, entry in self.flyers.items()
+                 if (_expires(entry) or datetime.date.min) < cutoff]
+        for fid in stale:
+            del self.flyers[fid]
+        return len(stale)
+
+    def save(self):
+        with open(self.path, 'w') as f:
+            json.dump(self.flyers, f, indent=2, sort_keys=True)
@@ -4,9 +4,18 @@ import datetime
 import os
 import time
 import re
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
 from classifier import categorize_groceries
+import local_classifier
+from metrics import RunReport, profile_run
+from flyer_manifest import FlyerManifest
+from price_episodes import LEGACY_REGION
+from watchlist import ALERTS_FILE, check_new_deals, write_alerts
+from deal_scores import add_deal_scores
+from aggregates import AGGREGATES_DIR, write_aggregates
+from columnar import ARROW_FILE, CLEAN_DATASET_DIR, dataset_bytes, write_arrow, write_clean_dataset
 
 # --- 1. CONFIGURATION & SECRETS ---
 dotenv_path = os.path.join(os.path.dirname(__file__), '.env')
@@ -14,10 +23,13 @@ load_dotenv(dotenv_path)
 
 # Files
 HISTORY_FILE = 'seton_grocery_history.csv' # The "Raw" Database (Input for cleaner)
-DASHBOARD_FILE = 'clean_grocery_data.csv'  # The "Clean" Database (Output for dashboard)
+DASHBOARD_FILE = 'clean_grocery_data.csv'  # Optional CSV export of the "Clean" Database
+DASHBOARD_DATASET = CLEAN_DATASET_DIR       # The "Clean" Database (Parquet, read by the dashboard)
+RUN_REPORT_DIR = 'run_reports'             # JSON timing/counter report per scrape
 
 # Scraper Settings
-POSTAL_CODE = "T3M1M9"
+POSTAL_CODE = "T3M1M9"          # Default region to scrape
+MAX_REGION_WORKERS = 8          # Concurrent flyer-list requests in multi-region mode
 STORES = [
     "Real Canadian Superstore", "Save-On-Foods", "Calgary Co-op",
     "Sobeys", "Safeway", "No Frills"
@@ -30,6 +42,9 @@ HEADERS = {
     "Referer": "https://flipp.com/"
 }
 
+# Instrumentation (reset at the start of each run)
+run_report = RunReport("scrape")
+
 # --- 2. CLEANER CONFIGURATION (Category Mapping) ---
 CATEGORY_MAP = {
     # Meat & Protein
@@ -97,15 +112,29 @@ def clean_price(item_dict):
     except:
         return raw_price, None
 
-def run_post_processing_cleaner():
+def run_post_processing_cleaner(export_csv=True):
     """
-    This runs immediately after scraping to generate the 'clean' file for the dashboard.
+    This runs immediately after scraping to generate the 'clean' dataset for the dashboard.
     """
     print("\n--- 🧹 Running Cleaner Pipeline ---")
     if not os.path.exists(HISTORY_FILE):
         print(f"[!] Error: {HISTORY_FILE} not found to clean.")
         return
 
+    with run_report.stage("cleaning"):
+        df = _clean_history()
+    with run_report.stage("deal_scores"):
+        df = add_deal_scores(df)
+    with run_report.stage("parquet"):
+        write_clean_dataset(df, DASHBOARD_DATASET)
+    run_report.count("bytes_written", dataset_bytes(DASHBOARD_DATASET))
+    if export_csv:
+        with run_report.stage("csv_export"):
+            df.to_csv(DASHBOARD_FILE, index=False)
+        run_report.count("bytes_written", os.path.getsize(DASHBOARD_FILE))
+    print(f"✅ Dashboard Ready! Clean data saved to: {DASHBOARD_DATASET}/" + (f" and {DASHBOARD_FILE}" if export_csv else ""))
+
+def _clean_history():
     # Load History
     df = pd.read_csv(HISTORY_FILE)
     
@@ -113,7 +142,8 @@ def run_post_processing_cleaner():
     df = df.rename(columns={
         'Item': 'item', 'Store': 'store', 'Category': 'category',
         'Price_Value': 'price', 'Date': 'date', 'Sub_Category': 'sub_category',
-        'Original_Price': 'original_price', 'Valid_Until': 'valid_until'
+        'Original_Price': 'original_price', 'Valid_Until': 'valid_until',
+        'Region': 'region'
     })
 
     # Apply Mappings
@@ -135,48 +165,75 @@ def run_post_processing_cleaner():
     else:
         df['savings_pct'] = 0
 
-    # Save
-    df.to_csv(DASHBOARD_FILE, index=False)
-    print(f"✅ Dashboard Ready! Clean data saved to: {DASHBOARD_FILE}")
+    return df
 
 # --- 4. MAIN SCRAPER LOGIC ---
-print(f">> Scanning flyers for {POSTAL_CODE}...")
-flyers = get_active_flyers(POSTAL_CODE)
-if not flyers:
-    print("[!] No flyers found.")
-    exit()
-
-selected_flyers = []
-for store in STORES:
-    matches = [f for f in flyers if store.lower() in f.get('merchant', '').lower()]
-    best = None
-    for f in matches:
-        if "weekly" in f.get('name', '').lower(): best = f; break
-        if not best: best = f
-    if best:
-        selected_flyers.append(best)
-        print(f"   + Selected: {best['merchant']}")
-
-new_deals = []
-print("\n>> Extracting items...")
-for flyer in selected_flyers:
-    items = get_flyer_items(flyer['id'])
-    for item in items:
-        name = item.get('name')
-        price_txt, price_val = clean_price(item)
-        if name:
-            new_deals.append({
-                'Date': datetime.date.today(),
-                'Store': flyer['merchant'],
-                'Original_Name': name,
-                'Item': name, 
-                'Price_Text': price_txt if price_txt else "Check Store",
-                'Price_Value': price_val if price_val is not None else 0.0,
-                'Valid_Until': item.get('valid_to') or flyer.get('valid_to')
-            })
+def select_flyers(flyers):
+    selected_flyers = []
+    for store in STORES:
+        matches = [f for f in flyers if store.lower() in f.get('merchant', '').lower()]
+        best = None
+        for f in matches:
+            if "weekly" in f.get('name', '').lower(): best = f; break
+            if not best: best = f
+        if best:
+            selected_flyers.append(best)
+            print(f"   + Selected: {best['merchant']}")
+    return selected_flyers
+
+def list_region_flyers(postal_codes):
+    """Fetch every region's flyer list concurrently -> {postal_code: flyers}."""
+    workers = max(1, min(MAX_REGION_WORKERS, len(postal_codes)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(postal_codes, pool.map(get_active_flyers, postal_codes)))
+
+def collapse_region_flyers(region_flyers):
+    """
+    Select flyers per region, then merge chain flyers shared across regions
+    by id so each is fetched and classified once. Each returned flyer
+    carries the list of regions it serves.
+    """
+    unique = {}
+    for postal_code, flyers in region_flyers.items():
+        print(f"   [{postal_code}]")
+        for flyer in select_flyers(flyers):
+            merged = unique.setdefault(flyer['id'], dict(flyer, regions=[]))
+            merged['regions'].append(postal_code)
+    return list(unique.values())
+
+def extract_deals(selected_flyers):
+    new_deals = []
+    print("\n>> Extracting items...")
+    for flyer in selected_flyers:
+        with run_report.stage("item_fetch"):
+            items = get_flyer_items(flyer['id'])
+        run_report.count("items_fetched", len(items))
+        flyer['item_count'] = len(items)
+        with run_report.stage("price_parse"):
+            for item in items:
+                name = item.get('name')
+                price_txt, price_val = clean_price(item)
+                if price_val is None:
+                    run_report.count("price_parse_misses")
+                if not name:
+                    continue
+                # Fan shared flyers out to one row per region
+                for region in flyer.get('regions') or [POSTAL_CODE]:
+                    new_deals.append({
+                        'Date': datetime.date.today(),
+                        'Store': flyer['merchant'],
+                        'Original_Name': name,
+                        'Item': name, 
+                        'Price_Text': price_txt if price_txt else "Check Store",
+                        'Price_Value': price_val if price_val is not None else 0.0,
+                        'Valid_Until': item.get('valid_to') or flyer.get('valid_to'),
+                        'Region': region
+                    })
+    run_report.count("deals_extracted", len(new_deals))
+    return new_deals
 
 # --- 5. AI & CACHING ---
-if new_deals:
+def load_known_cache():
     known_cache = {}
     if os.path.exists(HISTORY_FILE):
         try:
@@ -185,11 +242,45 @@ if new_deals:
                 clean_cache = df_hist.drop_duplicates(subset=['Original_Name']).set_index('Original_Name')
                 known_cache = clean_cache[['Item', 'Category']].to_dict('index')
         except: pass
+    return known_cache
+
+def classify_locally(names, known_cache, threshold):
+    """Label names the local model is confident about. Returns the names still needing Gemini."""
+    if not names or threshold > 1:
+        return names
+    try:
+        model = local_classifier.load_or_train(history_file=HISTORY_FILE)
+        if model is None:
+            return names
+        predictions = model.predict(names)
+    except Exception as e:
+        # The local step is only a shortcut: on any failure send everything to Gemini
+        run_report.count("local_classifier_failures")
+        print(f"   [!] Local classifier failed, sending all new names to AI: {e}")
+        return names
+
+    remaining = []
+    for name, (category, confidence) in zip(names, predictions):
+        if category is not None and confidence >= threshold:
+            known_cache[name] = {'Category': category, 'Item': local_classifier.clean_name(name)}
+        else:
+            remaining.append(name)
+    return remaining
+
+def classify_deals(new_deals, local_threshold=local_classifier.CONFIDENCE_THRESHOLD):
+    with run_report.stage("cache_load"):
+        known_cache = load_known_cache()
 
     unique_names = list(set(d['Original_Name'] for d in new_deals))
-    unknown_items = [name for name in unique_names if name not in known_cache]
-    
-    print(f"   Found {len(unique_names)} items ({len(unknown_items)} new for AI).")
+    new_names = [name for name in unique_names if name not in known_cache]
+    with run_report.stage("local_classifier"):
+        unknown_items = classify_locally(new_names, known_cache, local_threshold)
+
+    print(f"   Found {len(unique_names)} items ({len(new_names)} new: "
+          f"{len(new_names) - len(unknown_items)} labelled locally, {len(unknown_items)} for AI).")
+    run_report.count("cache_hits", len(unique_names) - len(new_names))
+    run_report.count("local_items", len(new_names) - len(unknown_items))
+    run_report.count("ai_items", len(unknown_items))
 
     ai_results = []
     if unknown_items:
@@ -197,9 +288,12 @@ if new_deals:
         for i in range(0, len(unknown_items), batch_size):
             batch = unknown_items[i : i + batch_size]
             print(f"   ...AI Batch {i // batch_size + 1}/{len(unknown_items)//batch_size + 1}")
+            run_report.count("ai_batches")
             try:
-                ai_results.extend(categorize_groceries(batch))
+                with run_report.stage("ai_batches"):
+                    ai_results.extend(categorize_groceries(batch))
             except Exception as e:
+                run_report.count("ai_batch_failures")
                 print(f"   [!] Batch failed: {e}")
 
     for item in ai_results:
@@ -214,27 +308,145 @@ if new_deals:
         else:
             deal['Category'] = "Uncategorized"
             deal['Is_Deal'] = False
+    return new_deals
+
+# --- SAVE HISTORY ---
+def save_history(new_deals):
+    """Merge new deals into the history. Returns only the rows that weren't already there."""
+    with run_report.stage("history_merge"):
+        df_combined, df_inserted = _merge_history(new_deals)
+    run_report.count("history_rows", len(df_combined))
+    run_report.count("rows_inserted", len(df_inserted))
+    run_report.count("bytes_written", os.path.getsize(HISTORY_FILE))
+    print(f"\n>> History updated ({len(df_combined)} records).")
+
+    # Memory-mapped Arrow copy for the API workers
+    with run_report.stage("columnar"):
+        table = write_arrow(HISTORY_FILE, ARROW_FILE)
+    run_report.count("bytes_written", os.path.getsize(ARROW_FILE))
+
+    # Analytics tables for /cheapest, /history and /compare, built once instead of per API worker
+    with run_report.stage("aggregates"):
+        write_aggregates(table, AGGREGATES_DIR)
+    run_report.count("bytes_written", dataset_bytes(AGGREGATES_DIR))
+    return df_inserted
 
-    # --- SAVE HISTORY ---
+def _merge_history(new_deals):
     df_new = pd.DataFrame(new_deals)
     df_new['Item'] = df_new['Item'].astype(str).str.title()
     
     if os.path.exists(HISTORY_FILE):
         try:
             df_hist = pd.read_csv(HISTORY_FILE)
-            df_combined = pd.concat([df_hist, df_new])
+            if 'Region' not in df_hist.columns:
+                df_hist['Region'] = LEGACY_REGION
+            df_hist['Region'] = df_hist['Region'].fillna(LEGACY_REGION)
+            df_combined = pd.concat([df_hist, df_new], ignore_index=True)
         except:
             df_combined = df_new
     else:
         df_combined = df_new
             
-    df_combined.drop_duplicates(subset=['Store', 'Original_Name', 'Price_Text', 'Valid_Until'], inplace=True)
-    df_combined.to_csv(HISTORY_FILE, index=False)
-    print(f"\n>> History updated ({len(df_combined)} records).")
+    # History rows come first, so surviving rows past them are the genuinely new ones
+    n_history = len(df_combined) - len(df_new)
+    df_combined.drop_duplicates(subset=['Store', 'Original_Name', 'Price_Text', 'Valid_Until', 'Region'], inplace=True)
+    # Temp file + rename, like write_arrow: a crash mid-write can't truncate the only copy of the history
+    tmp_path = f"{HISTORY_FILE}.tmp{os.getpid()}"
+    df_combined.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, HISTORY_FILE)
+    return df_combined, df_combined[df_combined.index >= n_history]
+
+def check_watchlists(inserted):
+    """Match just-inserted rows against saved watches and append any alerts."""
+    with run_report.stage("watchlists"):
+        alerts = check_new_deals(inserted)
+        write_alerts(alerts, ALERTS_FILE)
+    run_report.count("alerts", len(alerts))
+    if alerts:
+        print(f"\n>> 🔔 {len(alerts)} watchlist alerts (saved to {ALERTS_FILE}):")
+        for alert in alerts[:20]:
+            print(f"   #{alert['Watch_Id']} {alert['Watch_Terms']!r}: {alert['Item']} @ {alert['Store']} - {alert['Price_Text']}")
+
+def skip_ingested_flyers(selected_flyers, manifest):
+    """Drop flyers the manifest says are already in the history and still running."""
+    to_fetch = []
+    for flyer in selected_flyers:
+        if manifest.is_fresh(flyer):
+            print(f"   = Already ingested: {flyer['merchant']} (flyer {flyer['id']})")
+        else:
+            to_fetch.append(flyer)
+    run_report.count("flyers_skipped", len(selected_flyers) - len(to_fetch))
+    return to_fetch
+
+def scrape(postal_codes=(POSTAL_CODE,), force=False, export_csv=True,
+           local_threshold=local_classifier.CONFIDENCE_THRESHOLD):
+    postal_codes = list(postal_codes)
+    print(f">> Scanning flyers for {', '.join(postal_codes)}...")
+    with run_report.stage("flyer_list"):
+        region_flyers = list_region_flyers(postal_codes)
+    run_report.count("regions", len(postal_codes))
+    run_report.count("flyers_found", sum(len(f) for f in region_flyers.values()))
+    if not any(region_flyers.values()):
+        print("[!] No flyers found.")
+        return
+
+    selected_flyers = collapse_region_flyers(region_flyers)
+    run_report.count("flyers_selected", sum(len(f['regions']) for f in selected_flyers))
+    run_report.count("flyers_unique", len(selected_flyers))
+
+    manifest = FlyerManifest()
+    if not force:
+        selected_flyers = skip_ingested_flyers(selected_flyers, manifest)
+        if not selected_flyers:
+            print("\n>> All selected flyers are already ingested. Use --force to refetch.")
+            return
+
+    new_deals = extract_deals(selected_flyers)
+
+    if new_deals:
+        classify_deals(new_deals, local_threshold)
+        inserted = save_history(new_deals)
+        check_watchlists(inserted)
+
+        # Only mark flyers ingested once their rows are safely in the history
+        for flyer in selected_flyers:
+            if flyer.get('item_count'):
+                manifest.record(flyer, flyer['item_count'], flyer.get('regions'))
+        manifest.prune()
+        manifest.save()
+
+        # --- 6. TRIGGER CLEANER ---
+        # This creates the clean dataset for the dashboard
+        run_post_processing_cleaner(export_csv)
+
+    else:
+        print("[!] No items found.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape weekly flyers into the grocery history.")
+    parser.add_argument("--postal-codes", default=POSTAL_CODE,
+                        help=f"Comma-separated postal codes to scrape (default {POSTAL_CODE})")
+    parser.add_argument("--force", action="store_true", help="Refetch flyers even if the manifest says they're already ingested")
+    parser.add_argument("--local-threshold", type=float, default=local_classifier.CONFIDENCE_THRESHOLD,
+                        help="Min confidence for the local classifier to label a new name instead of Gemini "
+                             f"(default {local_classifier.CONFIDENCE_THRESHOLD}; above 1 sends everything to Gemini)")
+    parser.add_argument("--no-csv", action="store_true", help=f"Skip the {DASHBOARD_FILE} export (the dashboard reads {DASHBOARD_DATASET}/)")
+    parser.add_argument("--profile", action="store_true", help=f"Capture a cProfile of this run into {RUN_REPORT_DIR}/")
+    args = parser.parse_args()
+
+    postal_codes = [p.strip().upper().replace(" ", "") for p in args.postal_codes.split(",") if p.strip()]
+
+    run_report.reset()
+    if args.profile:
+        stamp = run_report.started_at.strftime("%Y%m%d_%H%M%S")
+        with profile_run(os.path.join(RUN_REPORT_DIR, f"scrape_{stamp}.prof")):
+            scrape(postal_codes, force=args.force, export_csv=not args.no_csv, local_threshold=args.local_threshold)
+    else:
+        scrape(postal_codes, force=args.force, export_csv=not args.no_csv, local_threshold=args.local_threshold)
 
-    # --- 6. TRIGGER CLEANER ---
-    # This creates the clean file for the dashboard
-    run_post_processing_cleaner()
+    report_path = run_report.save(RUN_REPORT_DIR)
+    print(f"\n--- ⏱️ Run Report ({report_path}) ---")
+    print(run_report.summary())
 
-else:
-    print("[!] No items found.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
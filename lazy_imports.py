@@ -0,0 +1,43 @@
+"""
+Deferred imports for heavy optional libraries.
+
+lazy_import("plotly.express") returns a stand-in straight away and only runs
+the real import on first attribute access (px.line, genai.configure, ...).
+Sessions that never click Analyze, scan or chart never pay for Gemini,
+plotly, PIL, pyzbar, thefuzz or supabase.
+
+The stand-in is deliberately kept out of sys.modules: tools that walk every
+loaded module (inspect.getmodule, streamlit's bare-mode checks) would
+otherwise trigger the import. A missing top-level package still fails at
+startup, since its spec is looked up eagerly.
+"""
+import importlib
+import importlib.util
+
+
+class LazyModule:
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        if self._module is None:
+            self.__dict__['_module'] = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    top_level = name.partition('.')[0]
+    if importlib.util.find_spec(top_level) is None:
+        raise ModuleNotFoundError(f"No module named '{top_level}'", name=top_level)
+    return LazyModule(name)
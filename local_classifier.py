@@ -0,0 +1,303 @@
+"""
+Local pre-classifier for flyer names.
+
+get_deals.py used to send every name it hadn't seen before to Gemini. This
+model is trained offline from the (Original_Name -> Category) pairs already
+in the history: softmax regression over TF-IDF weighted character trigrams
+plus whole words, numpy only. Scoring a name is a sparse gather of its
+grams' weight rows, so a batch of names costs tens of microseconds each.
+
+Confidence is the top category's probability. Names at or above
+CONFIDENCE_THRESHOLD are labelled locally; the rest still go to Gemini.
+
+Usage:
+    python local_classifier.py train                 # retrain from the history, report, save
+    python local_classifier.py eval                  # held-out accuracy / latency report only
+    python local_classifier.py classify "SCHNEIDERS® HAM STEAK, 175g"
+"""
+import argparse
+import os
+import re
+import time
+from typing import get_args
+
+import numpy as np
+import pandas as pd
+
+from classifier import CategoryType
+
+MODEL_FILE = 'local_classifier.npz'
+HISTORY_FILE = 'seton_grocery_history.csv'
+
+CONFIDENCE_THRESHOLD = 0.85   # Below this, names go to Gemini
+HOLDOUT_FRACTION = 0.2
+REPORT_THRESHOLDS = [0.5, 0.7, 0.8, 0.85, 0.9, 0.95]
+
+# Training (full-batch Adam; a few seconds on the real history)
+L2 = 1e-5
+ITERATIONS = 200
+LEARNING_RATE = 0.05
+
+# Pack sizes and weights don't help the category and make the same product look new
+_SIZE = re.compile(r"\b\d+(?:\.\d+)?\s*(?:x\s*\d+(?:\.\d+)?\s*)?(?:g|kg|lb|lbs|ml|l|oz|pk|pack|ct|un|ea)\b", re.I)
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_MARKS = re.compile(r"[®™©]")
+
+
+def normalize(name):
+    text = _NON_WORD.sub(" ", _SIZE.sub(" ", str(name).lower()))
+    return " ".join(text.split())
+
+
+def features(name):
+    """Character trigrams (word-boundary padded) plus whole words."""
+    text = f" {normalize(name)} "
+    grams = [text[i:i + 3] for i in range(len(text) - 2)]
+    grams.extend("w:" + word for word in text.split())
+    return grams
+
+
+def clean_name(original):
+    """Display name without sizes and trademark marks (the history title-cases it on merge)."""
+    name = _SIZE.sub(" ", _MARKS.sub("", str(original)))
+    name = re.sub(r"\s*,\s*(?=,|$)|\s+", " ", name)
+    return name.strip(" ,-")
+
+
+# --- 1. MODEL ---
+class LocalClassifier:
+    def __init__(self, vocab, idf, weights, bias, categories):
+        self.vocab = vocab if isinstance(vocab, dict) else {g: i for i, g in enumerate(vocab)}
+        self.idf = idf
+        self.weights, self.bias = weights, bias   # (n_grams, n_categories), (n_categories,)
+        self.categories = list(categories)
+
+    @staticmethod
+    def _entries(names, vocab, grow=False):
+        """Sparse (row, gram) pairs per name, repeats kept for the term counts."""
+        rows, cols = [], []
+        for i, name in enumerate(names):
+            for gram in features(name):
+                j = vocab.get(gram)
+                if j is None:
+                    if not grow:
+                        continue
+                    j = vocab[gram] = len(vocab)
+                rows.append(i)
+                cols.append(j)
+        return np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)
+
+    @staticmethod
+    def _tfidf(rows, cols, n_rows, idf):
+        """Unit-length TF-IDF values as sorted (row, col, value) triples."""
+        n_cols = len(idf)
+        keys, counts = np.unique(rows * n_cols + cols, return_counts=True)
+        rows, cols = keys // n_cols, keys % n_cols
+        values = counts * idf[cols]
+        norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=n_rows))
+        return rows, cols, values / norms[rows]
+
+    @classmethod
+    def fit(cls, names, categories, l2=L2, iterations=ITERATIONS, learning_rate=LEARNING_RATE):
+        """Softmax regression on TF-IDF features, full-batch Adam."""
+        names, categories = list(names), list(categories)
+        label_names = sorted(set(categories))
+        vocab = {}
+        rows, cols = cls._entries(names, vocab, grow=True)
+        keep = np.unique(rows)   # Names made only of sizes/punctuation have nothing to learn from
+        remap = np.full(len(names), -1)
+        remap[keep] = np.arange(len(keep))
+        rows, n = remap[rows], len(keep)
+
+        doc_freq = np.bincount(np.unique(rows * len(vocab) + cols) % len(vocab), minlength=len(vocab))
+        idf = np.log((1 + n) / (1 + doc_freq)) + 1
+        rows, cols, values = cls._tfidf(rows, cols, n, idf)
+
+        labels = np.array([label_names.index(categories[i]) for i in keep])
+        targets = np.eye(len(label_names))[labels]
+        weights = np.zeros((len(vocab), len(label_names)))
+        bias = np.zeros(len(label_names))
+        moments = [np.zeros_like(weights), np.zeros_like(weights), np.zeros_like(bias), np.zeros_like(bias)]
+        for step in range(1, iterations + 1):
+            logits = _sparse_dot(rows, cols, values, weights, n) + bias
+            error = (_softmax(logits) - targets) / n
+            grad_w = np.stack([
+                np.bincount(cols, weights=values * error[rows, k], minlength=len(vocab))
+                for k in range(len(label_names))
+            ], axis=1) + l2 * weights
+            for param, grad, m, v in ((weights, grad_w, *moments[:2]), (bias, error.sum(axis=0), *moments[2:])):
+                m *= 0.9
+                m += 0.1 * grad
+                v *= 0.999
+                v += 0.001 * grad * grad
+                param -= learning_rate * (m / (1 - 0.9 ** step)) / (np.sqrt(v / (1 - 0.999 ** step)) + 1e-8)
+        return cls(vocab, idf, weights.astype(np.float32), bias, label_names)
+
+    def predict(self, names):
+        """[(category, confidence), ...] for each name; confidence is the top class probability."""
+        names = list(names)
+        rows, cols = self._entries(names, self.vocab)
+        if len(rows):
+            rows, cols, values = self._tfidf(rows, cols, len(names), self.idf)
+            logits = _sparse_dot(rows, cols, values, self.weights, len(names)) + self.bias
+        else:
+            logits = np.tile(self.bias, (len(names), 1))
+        probs = _softmax(logits)
+        known = np.zeros(len(names), dtype=bool)
+        known[rows] = True
+        best = probs.argmax(axis=1)
+        return [
+            (self.categories[b], float(probs[i, b])) if known[i] else (None, 0.0)
+            for i, b in enumerate(best)
+        ]
+
+    def save(self, path=MODEL_FILE):
+        vocab = np.array(sorted(self.vocab, key=self.vocab.get))
+        np.savez_compressed(path, vocab=vocab, idf=self.idf, weights=self.weights, bias=self.bias,
+                            categories=np.array(self.categories))
+
+    @classmethod
+    def load(cls, path=MODEL_FILE):
+        with np.load(path) as data:
+            return cls(data["vocab"].tolist(), data["idf"], data["weights"], data["bias"],
+                       data["categories"].tolist())
+
+
+def _sparse_dot(rows, cols, values, weights, n_rows):
+    """(sparse n_rows x n_grams matrix given as sorted triples) @ weights."""
+    out = np.zeros((n_rows, weights.shape[1]))
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    out[rows[starts]] = np.add.reduceat(values[:, None] * weights[cols], starts)
+    return out
+
+
+def _softmax(logits):
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+# --- 2. TRAINING DATA ---
+def training_pairs(history_file=HISTORY_FILE):
+    """One (Original_Name, Item, Category) row per name, latest label wins, current categories only."""
+    df = pd.read_csv(history_file, usecols=["Original_Name", "Item", "Category"])
+    df = df[df["Category"].isin(get_args(CategoryType))].dropna(subset=["Original_Name"])
+    return df.drop_duplicates(subset=["Original_Name"], keep="last").reset_index(drop=True)
+
+
+def train(history_file=HISTORY_FILE, path=MODEL_FILE):
+    """Fit and save a model from the history. Returns (None, 0) if no names carry a current category."""
+    pairs = training_pairs(history_file)
+    if pairs.empty:
+        return None, 0
+    model = LocalClassifier.fit(pairs["Original_Name"].tolist(), pairs["Category"].tolist())
+    model.save(path)
+    return model, len(pairs)
+
+
+def load_or_train(path=MODEL_FILE, history_file=HISTORY_FILE):
+    """Saved model if there is one, else a fresh one from the history (None if there's nothing to learn from)."""
+    if os.path.exists(path):
+        return LocalClassifier.load(path)
+    if not os.path.exists(history_file):
+        return None
+    print(f"   Training local classifier from {history_file}...")
+    model, _ = train(history_file, path)
+    return model
+
+
+# --- 3. EVALUATION ---
+def evaluate(pairs, holdout=HOLDOUT_FRACTION, random_state=0):
+    """Accuracy, Gemini offload and latency on a held-out split of the history pairs."""
+    order = np.random.default_rng(random_state).permutation(len(pairs))
+    cut = int(len(pairs) * (1 - holdout))
+    train_rows, test_rows = pairs.iloc[order[:cut]], pairs.iloc[order[cut:]]
+
+    start = time.perf_counter()
+    model = LocalClassifier.fit(train_rows["Original_Name"].tolist(), train_rows["Category"].tolist())
+    fit_seconds = time.perf_counter() - start
+
+    names = test_rows["Original_Name"].tolist()
+    start = time.perf_counter()
+    predictions = model.predict(names)
+    batch_us = (time.perf_counter() - start) / len(names) * 1e6
+    single_us = []
+    for name in names[:500]:
+        start = time.perf_counter()
+        model.predict([name])
+        single_us.append((time.perf_counter() - start) * 1e6)
+
+    predicted = np.array([p for p, _ in predictions], dtype=object)
+    confidence = np.array([c for _, c in predictions])
+    correct = predicted == test_rows["Category"].to_numpy()
+    by_threshold = []
+    for threshold in REPORT_THRESHOLDS:
+        local = confidence >= threshold
+        by_threshold.append({
+            "threshold": threshold,
+            "local_share": float(local.mean()),
+            "local_accuracy": float(correct[local].mean()) if local.any() else None,
+        })
+
+    cleaned = test_rows["Original_Name"].map(clean_name).str.title()
+    return {
+        "train": len(train_rows),
+        "test": len(test_rows),
+        "fit_seconds": fit_seconds,
+        "accuracy": float(correct.mean()),
+        "by_threshold": by_threshold,
+        "clean_name_match": float((cleaned == test_rows["Item"].astype(str)).mean()),
+        "batch_us_per_name": batch_us,
+        "single_us_p50": float(np.percentile(single_us, 50)),
+        "single_us_p99": float(np.percentile(single_us, 99)),
+    }
+
+
+def print_report(report, threshold=CONFIDENCE_THRESHOLD):
+    print(f"--- 📊 Held-out report ({report['train']} train / {report['test']} test names) ---")
+    print(f"   Fit: {report['fit_seconds']:.2f}s")
+    print(f"   Accuracy (every name labelled locally): {report['accuracy']:.1%}")
+    for row in report["by_threshold"]:
+        marker = "  <- CONFIDENCE_THRESHOLD" if abs(row["threshold"] - threshold) < 1e-9 else ""
+        accuracy = f"{row['local_accuracy']:.1%}" if row["local_accuracy"] is not None else "-"
+        print(f"   threshold {row['threshold']:.2f}: {row['local_share']:6.1%} kept local, "
+              f"{accuracy} correct, {1 - row['local_share']:6.1%} to Gemini{marker}")
+    print(f"   Clean names matching the history's Item: {report['clean_name_match']:.1%}")
+    print(f"   Latency: {report['batch_us_per_name']:.0f}us/name batched, "
+          f"{report['single_us_p50']:.0f}us p50 / {report['single_us_p99']:.0f}us p99 one at a time")
+
+
+# --- 4. CLI ---
+def main():
+    parser = argparse.ArgumentParser(description="Train and check the local grocery pre-classifier.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for command, help_text in (("train", "Retrain from the history and save the model"),
+                               ("eval", "Held-out accuracy and latency report")):
+        cmd = sub.add_parser(command, help=help_text)
+        cmd.add_argument("--history", default=HISTORY_FILE)
+        cmd.add_argument("--threshold", type=float, default=CONFIDENCE_THRESHOLD)
+    classify = sub.add_parser("classify", help="Label names with the saved model")
+    classify.add_argument("names", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "classify":
+        model = load_or_train()
+        if model is None:
+            print(f"[!] No model and no {HISTORY_FILE} to train one from.")
+            return
+        for name, (category, confidence) in zip(args.names, model.predict(args.names)):
+            route = "local" if confidence >= CONFIDENCE_THRESHOLD else "Gemini"
+            print(f"   {name!r} -> {category} ({confidence:.2f}, {route}) as {clean_name(name)!r}")
+        return
+
+    pairs = training_pairs(args.history)
+    if pairs.empty:
+        print(f"[!] No labelled names in {args.history}.")
+        return
+    print_report(evaluate(pairs), args.threshold)
+    if args.command == "train":
+        _, n_pairs = train(args.history, MODEL_FILE)
+        print(f"✅ Trained on {n_pairs} names, saved to {MODEL_FILE}")
+
+
+if __name__ == "__main__":
+    main()
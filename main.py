@@ -1,25 +1,144 @@
-from fastapi import FastAPI, HTTPException
-import pandas as pd
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+import pyarrow as pa
+import pyarrow.compute as pc
+import time
 from typing import List, Optional
+from metrics import RouteMetrics, dataset_gauges
+from price_episodes import EpisodeIndex, compact_history
+from columnar import ARROW_FILE, HISTORY_SCHEMA, open_dataset
+from aggregates import AGGREGATES_DIR, PriceAggregates, aggregates_version
+from result_cache import ResultCache
+import os
+import threading
 
 app = FastAPI()
+route_metrics = RouteMetrics()
+# Serialized /search results and /stats bodies, keyed on the data version (cleared on reload)
+result_cache = ResultCache(max_entries=1024, max_bytes=64 * 1024 * 1024)
 
 # 1. LOAD YOUR DATA
-# We load the CSV once when the server starts
+# We memory-map the Arrow copy of the CSV once when the server starts.
+# Every worker shares the same pages through the OS page cache.
 csv_file = "seton_grocery_history.csv" 
 
-try:
-    # Load data and fill missing values to avoid errors
-    df = pd.read_csv(csv_file)
-    df = df.fillna("")
-    print(f"✅ Loaded {len(df)} records from {csv_file}")
-except Exception as e:
-    print(f"❌ Error loading CSV: {e}")
-    df = pd.DataFrame() # Create empty if fails
+def load_data(path=csv_file, arrow_path=ARROW_FILE):
+    try:
+        data = open_dataset(path, arrow_path)
+        print(f"✅ Mapped {data.num_rows} records from {arrow_path}")
+        return data
+    except Exception as e:
+        print(f"❌ Error loading data: {e}")
+        return HISTORY_SCHEMA.empty_table() # Empty if fails
+
+def load_episodes(dataset):
+    # Compact repeat sightings into price episodes for /price-series, from the mapped table
+    try:
+        strings = pa.schema([pa.field(f.name, pa.string()) if pa.types.is_dictionary(f.type) else f
+                             for f in dataset.schema])
+        episodes = compact_history(dataset.cast(strings).to_pandas(date_as_object=False))
+        print(f"✅ Loaded {len(episodes)} price episodes")
+        return EpisodeIndex(episodes)
+    except Exception as e:
+        print(f"❌ Error loading price episodes: {e}")
+        return None
+
+def load_aggregates(dataset, arrow_version):
+    # get_deals.py writes these after the Arrow file; build in memory only if they're missing or older
+    try:
+        if aggregates_version() >= arrow_version:
+            return PriceAggregates.open(AGGREGATES_DIR)
+        print(f"   [!] {AGGREGATES_DIR} missing or older than {ARROW_FILE}, aggregating in memory")
+    except Exception as e:
+        print(f"❌ Error mapping price aggregates, aggregating in memory: {e}")
+    return PriceAggregates.build(dataset)
+
+def file_version(path):
+    return os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+
+def data_version():
+    # Changes whenever get_deals.py rewrites the history, its Arrow copy or the aggregates
+    return (file_version(csv_file), file_version(ARROW_FILE), aggregates_version())
+
+class ApiData:
+    """Everything the endpoints read, built together and swapped in as one object."""
+    def __init__(self, version, dataset, aggregates):
+        self.version = version
+        self.dataset = dataset
+        self.aggregates = aggregates
+        self.dataset_info = dataset_gauges(dataset, ARROW_FILE)
+        self._episode_index = None
+        self._episodes_built = False
+        self._episode_lock = threading.Lock()
+
+    def episode_index(self):
+        # Built on the first /price-series request, so workers that never serve it pay nothing
+        with self._episode_lock:
+            if not self._episodes_built:
+                self._episode_index = load_episodes(self.dataset)
+                self._episodes_built = True   # Don't retry a failed build on every request
+            return self._episode_index
+
+def load_api_data():
+    # Read before loading, so files rewritten mid-load still count as a change next request
+    version = data_version()
+    dataset = load_data()
+    csv_version, arrow_version, aggregates_mtime = version
+    if arrow_version < csv_version:
+        # open_dataset() just rebuilt the stale Arrow copy; that isn't a new scrape to reload for
+        arrow_version = file_version(ARROW_FILE)
+        version = (csv_version, arrow_version, aggregates_mtime)
+    return ApiData(version, dataset, load_aggregates(dataset, arrow_version))
+
+# Held while a reload builds; requests meanwhile keep answering from the old data
+reload_lock = threading.Lock()
+
+def refresh_data():
+    """(Re)load the dataset and rebuild everything derived from it."""
+    global current
+    with reload_lock:
+        current = load_api_data()
+        result_cache.clear()
+
+def reload_if_changed():
+    global current
+    if not reload_lock.acquire(blocking=False):
+        return   # Another request is already reloading
+    try:
+        if data_version() != current.version:
+            print("🔄 Data changed on disk, reloading...")
+            current = load_api_data()
+            result_cache.clear()
+    finally:
+        reload_lock.release()
+
+refresh_data()
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    start = time.perf_counter()
+    if data_version() != current.version:
+        # Loading takes seconds on a big history: keep it off the event loop
+        await run_in_threadpool(reload_if_changed)
+    response = await call_next(request)
+    # Use the route template (e.g. /history/{item}) so paths don't explode the label set
+    route = request.scope.get("route")
+    route_metrics.observe(getattr(route, "path", "unmatched"), time.perf_counter() - start, response.status_code)
+    return response
+
+def json_bytes(payload):
+    # Same bytes FastAPI would send for the dict, so cached and fresh responses match
+    return JSONResponse(jsonable_encoder(payload)).body
+
+def cached_json(key, version, build):
+    body = result_cache.get_or_compute(key + (version,), lambda: json_bytes(build()))
+    return Response(content=body, media_type="application/json")
 
 @app.get("/")
 def home():
-    return {"message": "Weekly Deals API is Online", "record_count": len(df)}
+    return {"message": "Weekly Deals API is Online", "record_count": current.dataset.num_rows}
 
 # 2. SEARCH ENDPOINT (The Core Feature)
 # Usage: /search?q=ketchup
@@ -29,30 +148,121 @@ def search_items(q: str):
     Search for a product by name (e.g., 'milk', 'bread').
     Returns all historical prices for that item.
     """
-    if df.empty:
+    data = current   # One snapshot for the whole request, even if a reload swaps it
+    if data.dataset.num_rows == 0:
         return {"error": "No data loaded"}
 
+    # The match ignores case, so 'Milk' and 'milk' share one cached result...
+    query = q.lower()
+    results = result_cache.get_or_compute(("search", query, data.version),
+                                          lambda: json_bytes(run_search(data.dataset, query)))
+    # ...but the response echoes the query as sent: splice it in front of {"count":...,"results":[...]}
+    body = json_bytes({"query": q})[:-1] + b"," + results[1:]
+    return Response(content=body, media_type="application/json")
+
+def run_search(dataset, q):
     # Case-insensitive search
     # We look in 'Item' and 'Original_Name' columns
-    mask = (
-        df['Item'].str.contains(q, case=False, na=False) | 
-        df['Original_Name'].str.contains(q, case=False, na=False)
+    mask = pc.or_kleene(
+        pc.match_substring(dataset['Item'], q, ignore_case=True),
+        pc.match_substring(dataset['Original_Name'], q, ignore_case=True)
     )
-    results = df[mask]
+    results = dataset.filter(pc.fill_null(mask, False))
 
-    # Convert to a list of dictionaries (JSON)
+    # Convert to a list of dictionaries (JSON); missing values come back as null
     return {
-        "query": q,
-        "count": len(results),
-        "results": results.to_dict(orient="records")
+        "count": results.num_rows,
+        "results": results.to_pylist()
     }
 
 # 3. STATS ENDPOINT (Optional)
 # Usage: /stats
 @app.get("/stats")
 def get_stats():
+    data = current
+    dataset = data.dataset
+    return cached_json(("stats",), data.version, lambda: {
+        "total_records": dataset.num_rows,
+        "stores": pc.unique(dataset['Store']).to_pylist(),
+        "categories": pc.unique(dataset['Category']).to_pylist()
+    })
+
+# 4. PRICE SERIES ENDPOINT
+# Usage: /price-series?q=butter&store=safeway
+@app.get("/price-series")
+def price_series(q: str, store: Optional[str] = None, region: Optional[str] = None):
+    """
+    Price episodes for a product: one entry per run of identical sightings,
+    with first_seen / last_seen instead of a row per scrape.
+    """
+    episode_index = current.episode_index()
+    if episode_index is None:
+        return {"error": "No data loaded"}
+
+    series = episode_index.price_series(q, store=store, region=region)
+    summary = EpisodeIndex.summary(series)
+    series = series.drop(columns=["sightings"]).astype(object)
+    series = series.where(series.notna(), None)
     return {
-        "total_records": len(df),
-        "stores": df['Store'].unique().tolist(),
-        "categories": df['Category'].unique().tolist()
-    }
\ No newline at end of file
+        "query": q,
+        "count": len(series),
+        "summary": summary,
+        "episodes": series.to_dict(orient="records")
+    }
+
+# 5. ANALYTICS ENDPOINTS (pre-aggregated at load time)
+# Usage: /cheapest?item=Greek Yogurt
+@app.get("/cheapest")
+def cheapest(item: str, basis: str = "last_price"):
+    """Stores carrying an item, cheapest first by last, min or median price."""
+    if basis not in ("last_price", "min_price", "median_price"):
+        raise HTTPException(status_code=400, detail="basis must be last_price, min_price or median_price")
+    aggregates = current.aggregates
+    stores = aggregates.cheapest(item, basis)
+    if stores is None:
+        raise HTTPException(status_code=404, detail=f"No prices for '{item}'. Try /search for the exact item name.")
+    return {
+        "item": aggregates.name(item),
+        "basis": basis,
+        "cheapest": stores[0],
+        "stores": stores
+    }
+
+# Usage: /history/Greek Yogurt
+@app.get("/history/{item}")
+def item_history(item: str):
+    """Lowest price per store per scrape date for one item, oldest first."""
+    aggregates = current.aggregates
+    series = aggregates.history(item)
+    if series is None:
+        raise HTTPException(status_code=404, detail=f"No prices for '{item}'. Try /search for the exact item name.")
+    return {
+        "item": aggregates.name(item),
+        "count": len(series),
+        "series": series
+    }
+
+# Usage: /compare?week=2025-W50&category=Produce
+@app.get("/compare")
+def compare(week: Optional[str] = None, category: Optional[str] = None):
+    """Category price medians for a week (default: latest), with each store's median."""
+    aggregates = current.aggregates
+    week, categories = aggregates.compare(week, category)
+    if categories is None:
+        raise HTTPException(status_code=404, detail=f"No data for week '{week}'. Weeks look like 2025-W50.")
+    return {
+        "week": week,
+        "weeks_available": sorted(aggregates.weekly),
+        "categories": categories
+    }
+
+# 6. METRICS ENDPOINT
+# Usage: /metrics
+@app.get("/metrics")
+def get_metrics():
+    """Per-route latency histograms, dataset size gauges and result cache stats."""
+    return {
+        "dataset": current.dataset_info,
+        "routes": route_metrics.to_dict(),
+        "result_cache": result_cache.stats(),
+    }
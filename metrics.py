@@ -0,0 +1,154 @@
+"""
+Lightweight instrumentation shared by the scraper and the API.
+
+- RunReport: per-stage timers and counters for one get_deals.py run,
+  saved as a JSON report.
+- RouteMetrics: per-route latency histograms for main.py's /metrics.
+- profile_run: opt-in cProfile capture of a single run.
+"""
+import cProfile
+import datetime
+import io
+import json
+import os
+import pstats
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds, Prometheus-style (cumulative counts per bucket)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float("inf"))
+
+
+# --- 1. SCRAPE RUN REPORTS ---
+class RunReport:
+    def __init__(self, name):
+        self.name = name
+        self.reset()
+
+    def reset(self):
+        self.started_at = datetime.datetime.now()
+        self.stages = {}
+        self.counters = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block; repeated stages accumulate."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "total_seconds": round(sum(self.stages.values()), 4),
+            "stages": {k: round(v, 4) for k, v in self.stages.items()},
+            "counters": dict(self.counters),
+        }
+
+    def save(self, report_dir):
+        os.makedirs(report_dir, exist_ok=True)
+        stamp = self.started_at.strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(report_dir, f"{self.name}_{stamp}.json")
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    def summary(self):
+        lines = [f"   {name:<16} {seconds:8.3f} s" for name, seconds in self.stages.items()]
+        lines += [f"   {name:<16} {value:>8}" for name, value in self.counters.items()]
+        return "\n".join(lines)
+
+
+@contextmanager
+def profile_run(path, top=20):
+    """Capture a cProfile of the block, dump it to path and print the top calls."""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        profiler.dump_stats(path)
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+        print(out.getvalue())
+        print(f">> Profile saved to {path}")
+
+
+# --- 2. API LATENCY ---
+class LatencyHistogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+
+    def to_dict(self):
+        cumulative, running = {}, 0
+        for bound, n in zip(self.buckets, self.counts):
+            running += n
+            cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+        return {
+            "count": self.count,
+            "sum_seconds": round(self.total, 6),
+            "mean_seconds": round(self.total / self.count, 6) if self.count else 0.0,
+            "max_seconds": round(self.max, 6),
+            "buckets": cumulative,
+        }
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.routes = {}
+        self.statuses = {}
+
+    def observe(self, route, seconds, status_code):
+        self.routes.setdefault(route, LatencyHistogram()).observe(seconds)
+        key = f"{route} {status_code}"
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+
+    def to_dict(self):
+        return {
+            "latency": {route: hist.to_dict() for route, hist in self.routes.items()},
+            "responses": dict(self.statuses),
+        }
+
+
+def dataset_gauges(df, source=None):
+    """Size gauges for a loaded DataFrame or Arrow table (computed once at load time)."""
+    is_arrow = hasattr(df, "num_rows")
+    columns = df.column_names if is_arrow else list(df.columns)
+    gauges = {
+        "records": df.num_rows if is_arrow else len(df),
+        "columns": len(columns),
+        "loaded_at": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+    if is_arrow:
+        # Memory-mapped: these bytes live in the shared page cache, not per process
+        gauges["mapped_bytes"] = int(df.nbytes)
+    else:
+        gauges["memory_bytes"] = int(df.memory_usage(deep=True).sum()) if columns else 0
+    if source and os.path.exists(source):
+        gauges["source"] = source
+        gauges["source_bytes"] = os.path.getsize(source)
+    for col in ("Store", "Category", "Item"):
+        if col in columns:
+            gauges[f"unique_{col.lower()}"] = len(df[col].unique()) if is_arrow else int(df[col].nunique())
+    return gauges
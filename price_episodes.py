@@ -0,0 +1,134 @@
+"""
+Price-episode compaction of the history table.
+
+The history gets a new full row every time the same item is seen at the
+same store and price. An episode run-length encodes those repeats: one row
+per (store, region, item, price, ...) run of consecutive sightings, with
+first_seen / last_seen / valid_until for queries and a compact 'sightings'
+list (day offsets + Valid_Until) so expand_episodes() can rebuild every
+original row.
+
+The API builds episodes in memory from its mapped Arrow table on the first
+/price-series request; they aren't stored. As a CSV they come out larger than the rows they replace, since the
+history has few exact repeats.
+
+Sightings are encoded as 'd@v;d@v;...' where d is days since first_seen and
+v is Valid_Until as days after that sighting's Date plus any time/zone
+suffix verbatim ('6', '5T23:59:59-05:00'), or '=' + the raw string if it
+doesn't start with a YYYY-MM-DD date.
+"""
+import numpy as np
+import pandas as pd
+
+LEGACY_REGION = 'T3M1M9'   # History rows from before Region was recorded were all scraped here
+
+# Everything except Date / Valid_Until must match for sightings to share an episode
+SERIES_KEY = ['Store', 'Region', 'Original_Name']
+EPISODE_ATTRS = ['Item', 'Price_Text', 'Price_Value', 'Category', 'Sub_Category', 'Is_Deal', 'recorded_at']
+HISTORY_COLUMNS = [
+    'Date', 'Store', 'Item', 'Price_Text', 'Price_Value', 'Valid_Until', 'Category',
+    'Is_Deal', 'Original_Name', 'recorded_at', 'Sub_Category', 'Region'
+]
+_MISSING = '\x00'   # NaN-safe sentinel for change detection
+
+
+# --- 1. COMPACTION ---
+def compact_history(df):
+    """Run-length encode history rows into price episodes."""
+    df = df.copy()
+    for col in HISTORY_COLUMNS:
+        if col not in df.columns:
+            df[col] = np.nan
+    df['Region'] = df['Region'].fillna(LEGACY_REGION)
+    columns = [c for c in SERIES_KEY + EPISODE_ATTRS if c in df.columns]
+
+    df['_date'] = pd.to_datetime(df['Date'], format='%Y-%m-%d', errors='raise')
+    df = df.sort_values(SERIES_KEY + ['_date'], kind='stable', na_position='first')
+
+    # A new episode starts wherever any key/attribute differs from the previous sighting
+    compare = df[columns].astype(str).where(df[columns].notna(), _MISSING)
+    changed = (compare != compare.shift()).any(axis=1).to_numpy()
+    starts = np.flatnonzero(changed)
+    ends = np.append(starts[1:], len(df)) - 1
+
+    # Rows are contiguous per episode and date-sorted, so slice on the boundaries
+    episode_no = np.cumsum(changed) - 1
+    dates = df['_date'].to_numpy()
+    first_seen = pd.Series(dates[starts][episode_no], index=df.index)
+    day_offset = ((df['_date'] - first_seen).dt.days).astype(str)
+    tokens = (day_offset + '@' + _encode_valid_until(df['Valid_Until'], df['_date'])).tolist()
+
+    episodes = df.iloc[starts][columns].reset_index(drop=True)
+    episodes['first_seen'] = pd.Series(dates[starts]).dt.strftime('%Y-%m-%d')
+    episodes['last_seen'] = pd.Series(dates[ends]).dt.strftime('%Y-%m-%d')
+    episodes['valid_until'] = df['Valid_Until'].iloc[ends].astype(str).str[:10].to_numpy()
+    episodes['sightings_count'] = ends - starts + 1
+    episodes['sightings'] = [';'.join(tokens[a:b + 1]) for a, b in zip(starts, ends)]
+    return episodes.reset_index(drop=True)
+
+
+def _encode_valid_until(valid_until, dates):
+    raw = valid_until.astype(str).where(valid_until.notna(), '')
+    prefix = raw.str[:10]
+    parsed = pd.to_datetime(prefix, format='%Y-%m-%d', errors='coerce')
+    dated = parsed.notna() & (parsed.dt.strftime('%Y-%m-%d') == prefix)
+    offsets = (parsed - dates).dt.days.astype('Int64').astype(str)
+    token = (offsets + raw.str[10:]).where(dated, '=' + raw)
+    return token.where(raw != '', '')
+
+
+# --- 2. LOSSLESS EXPANSION ---
+def expand_episodes(episodes):
+    """Rebuild the original history rows (row order aside) from episodes."""
+    rows = episodes.assign(_token=episodes['sightings'].str.split(';')).explode('_token', ignore_index=True)
+    parts = rows['_token'].str.split('@', n=1, expand=True)
+    first_seen = pd.to_datetime(rows['first_seen'], format='%Y-%m-%d')
+    dates = first_seen + pd.to_timedelta(parts[0].astype(int), unit='D')
+
+    valid = parts[1].str.extract(r'^(-?\d+)(.*)$')
+    is_offset = valid[0].notna()
+    valid_dates = dates + pd.to_timedelta(valid[0].fillna('0').astype(int), unit='D')
+    rows['Valid_Until'] = np.where(
+        is_offset, valid_dates.dt.strftime('%Y-%m-%d') + valid[1].fillna(''),
+        np.where(parts[1] == '', None, parts[1].str[1:])
+    )
+    rows['Date'] = dates.dt.strftime('%Y-%m-%d')
+    columns = [c for c in HISTORY_COLUMNS if c in rows.columns]
+    return rows[columns]
+
+
+# --- 3. PRICE SERIES QUERIES ---
+class EpisodeIndex:
+    """Episodes plus a lowercased name column for repeated substring queries."""
+
+    def __init__(self, episodes):
+        # Sort once so query results come out oldest first without a per-query sort
+        episodes = episodes.sort_values(['first_seen', 'Store'], kind='stable').reset_index(drop=True)
+        self.episodes = episodes
+        self._items = episodes['Item'].fillna('').str.lower()
+        self._names = self._items + ' | ' + episodes['Original_Name'].fillna('').str.lower()
+
+    def price_series(self, query, store=None, region=None, match_original=True):
+        """Episodes whose Item (and optionally Original_Name) contains query, oldest first."""
+        names = self._names if match_original else self._items
+        mask = names.str.contains(query.lower(), regex=False)
+        if store:
+            mask &= self.episodes['Store'].str.contains(store, case=False, regex=False, na=False)
+        if region:
+            mask &= self.episodes['Region'] == region
+        return self.episodes[mask]
+
+    @staticmethod
+    def summary(series, min_price=0.01):
+        """Sighting-weighted stats over a price series (matches per-row history stats)."""
+        series = series[series['Price_Value'] > min_price]
+        if series.empty:
+            return None
+        weights = series['sightings_count']
+        return {
+            'avg': float((series['Price_Value'] * weights).sum() / weights.sum()),
+            'min': float(series['Price_Value'].min()),
+            'count': int(weights.sum()),
+            'episodes': len(series),
+        }
+
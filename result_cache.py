@@ -0,0 +1,76 @@
+"""
+Bounded LRU cache of serialized API responses.
+
+main.py keys entries on (route, normalized parameters, data version) and
+stores the JSON body bytes, so a repeat of a popular search skips both the
+scan and the serialization. Entries from an older data version can never be
+hit again; refresh_data() also clears them so they stop holding memory.
+"""
+import threading
+from collections import OrderedDict
+
+
+class ResultCache:
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, max_entry_bytes=4 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)   # Don't let one huge result flush everything
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()   # Sync endpoints run on FastAPI's thread pool
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = self.skipped = self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body):
+        with self._lock:
+            if len(body) > self.max_entry_bytes:
+                self.skipped += 1
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old)
+            self._entries[key] = body
+            self.bytes += len(body)
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Cached bytes for key, or compute() them (outside the lock) and cache the result."""
+        body = self.get(key)
+        if body is None:
+            body = compute()
+            self.put(key, body)
+        return body
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "skipped_too_large": self.skipped,
+                "invalidated": self.invalidations,
+            }
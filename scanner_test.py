@@ -1,15 +1,19 @@
 import streamlit as st
 import numpy as np
 import pandas as pd
-from PIL import Image
-from pyzbar.pyzbar import decode
 import requests
-import google.generativeai as genai
 import os
 from dotenv import load_dotenv
 import json
-from supabase import create_client, Client
-from thefuzz import process, fuzz
+from lazy_imports import lazy_import
+
+# Heavy libraries load on first use (first scan / first match / first cloud call)
+Image = lazy_import("PIL.Image")
+pyzbar = lazy_import("pyzbar.pyzbar")
+genai = lazy_import("google.generativeai")
+supabase_lib = lazy_import("supabase")
+process = lazy_import("thefuzz.process")
+fuzz = lazy_import("thefuzz.fuzz")
 
 # --- 1. CONFIGURATION (EDIT THIS TO MATCH YOUR DB) ---
 # Check your Supabase Table Editor for the exact name!
@@ -20,14 +24,17 @@ st.set_page_config(page_title="Waze for Groceries (Alpha)", page_icon="🛒", la
 # --- 2. CONNECTIONS ---
 load_dotenv()
 
-# Gemini Setup
+# Gemini Setup (configured on first AI call)
 api_key = os.getenv("GEMINI_API_KEY")
 MODEL_NAME = 'gemini-2.0-flash-exp'
-if api_key:
-    genai.configure(api_key=api_key)
-else:
+if not api_key:
     st.error("❌ Gemini API Key missing. Check .env")
 
+@st.cache_resource
+def get_gemini_model():
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(MODEL_NAME)
+
 # Supabase Setup
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
@@ -36,8 +43,10 @@ if not SUPABASE_URL or not SUPABASE_KEY:
     st.error("❌ Supabase Keys Missing! Check your .env file.")
     st.stop()
 
-# Initialize Connection
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Initialize Connection (on first cloud call)
+@st.cache_resource
+def get_supabase():
+    return supabase_lib.create_client(SUPABASE_URL, SUPABASE_KEY)
 
 # --- 3. CLOUD DATA FUNCTIONS ---
 
@@ -46,7 +55,7 @@ def fetch_live_history():
     """Pulls the latest verified price reports from Supabase."""
     try:
         # Fetch all records from the configured table
-        response = supabase.table(TABLE_NAME).select("*").execute()
+        response = get_supabase().table(TABLE_NAME).select("*").execute()
         df = pd.DataFrame(response.data)
         
         if df.empty:
@@ -74,7 +83,7 @@ def report_price_to_cloud(name, price, store):
         # Note: If your DB expects 'filename' or 'file_path', we might need to adjust this payload
     }
     try:
-        supabase.table(TABLE_NAME).insert(data).execute()
+        get_supabase().table(TABLE_NAME).insert(data).execute()
         st.toast("Price Reported to Cloud! ☁️", icon="🚀")
         st.cache_data.clear() # Clear cache so the new price shows up instantly
         return True
@@ -94,7 +103,7 @@ def fetch_product_name_api(barcode):
 
 def identify_image_with_gemini(image):
     if not api_key: return None
-    model = genai.GenerativeModel(MODEL_NAME)
+    model = get_gemini_model()
     prompt = "Identify Brand, Generic Type, and Size. Ex: 'Kraft Dinner 200g'. Return ONLY text."
     try:
         return model.generate_content([prompt, image]).text.strip()
@@ -102,7 +111,7 @@ def identify_image_with_gemini(image):
 
 def standardize_name(raw_name):
     if not raw_name: return None
-    model = genai.GenerativeModel(MODEL_NAME)
+    model = get_gemini_model()
     prompt = f"Clean this grocery name: '{raw_name}'. Format: 'Brand Product Size'. Example: 'Catelli Pasta 500g'. Return ONLY text."
     try:
         return model.generate_content(prompt).text.strip()
@@ -139,7 +148,7 @@ if img_buffer:
     raw_name = None
     
     # 1. Barcode
-    decoded = decode(img_array)
+    decoded = pyzbar.decode(img_array)
     if decoded:
         raw_name = fetch_product_name_api(decoded[0].data.decode("utf-8"))
         
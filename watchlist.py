@@ -0,0 +1,210 @@
+"""
+Watchlist alerts.
+
+Watches are stored in watchlists.json. Each watch has keyword terms, and
+optionally a store, a category and a max price. After each scrape,
+get_deals.py checks only the rows it just added to the history and appends
+any hits to watchlist_alerts.csv.
+
+Matching uses an inverted index from each term token to the watches that
+need it. A deal looks up its own tokens and counts hits per watch, so the
+cost grows with the deal's name length, not with the number of watches.
+
+Usage:
+    python watchlist.py add "greek yogurt" --max-price 5 --store Safeway
+    python watchlist.py list
+    python watchlist.py remove 3
+"""
+import argparse
+import datetime
+import json
+import os
+import re
+from collections import defaultdict
+
+import pandas as pd
+
+WATCHLIST_FILE = 'watchlists.json'
+ALERTS_FILE = 'watchlist_alerts.csv'
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+# Term-less watches (e.g. "anything in Dairy under $3") are indexed under their category, or
+# under a key every deal carries. Store-only watches match by substring ("Superstore"), so
+# they go through a per-store lookup that's worked out once per distinct deal store.
+_CATEGORY_KEY, _ANY_KEY = "\x00category:", "\x00any"
+
+
+def tokenize(text):
+    """Lowercase word tokens with a naive plural strip ('eggs' -> 'egg')."""
+    tokens = set()
+    for tok in _TOKEN.findall(str(text).lower()):
+        if len(tok) > 3 and tok.endswith('s') and not tok.endswith('ss'):
+            tok = tok[:-1]
+        tokens.add(tok)
+    return tokens
+
+
+# --- 1. STORAGE ---
+def load_watchlists(path=WATCHLIST_FILE):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_watchlists(watches, path=WATCHLIST_FILE):
+    with open(path, 'w') as f:
+        json.dump(watches, f, indent=2)
+
+
+def add_watch(watches, terms, store=None, category=None, max_price=None):
+    watch = {
+        'id': max((w['id'] for w in watches), default=0) + 1,
+        'terms': terms,
+        'store': store,
+        'category': category,
+        'max_price': max_price,
+        'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+    }
+    watches.append(watch)
+    return watch
+
+
+# --- 2. MATCHING ---
+class WatchMatcher:
+    def __init__(self, watches):
+        self.watches = {w['id']: w for w in watches}
+        self.required = {}
+        self.index = defaultdict(list)
+        self.store_watches = defaultdict(list)   # lowercased store filter -> store-only watch ids
+        self._store_hits = {}                    # deal store -> matching store-only watch ids
+        for w in watches:
+            keys = tokenize(w.get('terms') or '')
+            if not keys:
+                if w.get('category'):
+                    keys = {_CATEGORY_KEY + w['category'].lower()}
+                elif w.get('store'):
+                    self.required[w['id']] = 1
+                    self.store_watches[w['store'].lower()].append(w['id'])
+                    continue
+                else:
+                    keys = {_ANY_KEY}
+            self.required[w['id']] = len(keys)
+            for key in keys:
+                self.index[key].append(w['id'])
+
+    def _deal_keys(self, deal):
+        keys = tokenize(deal.get('Item', '')) | tokenize(deal.get('Original_Name', ''))
+        keys.add(_ANY_KEY)
+        if deal.get('Category'):
+            keys.add(_CATEGORY_KEY + str(deal['Category']).lower())
+        return keys
+
+    def _store_watch_ids(self, store):
+        """Store-only watches whose store filter is a substring of this deal's store (memoized)."""
+        store = str(store or '').lower()
+        if store not in self._store_hits:
+            self._store_hits[store] = [watch_id for wanted, ids in self.store_watches.items()
+                                       if wanted in store for watch_id in ids]
+        return self._store_hits[store]
+
+    @staticmethod
+    def _passes_filters(watch, deal):
+        if watch.get('store') and watch['store'].lower() not in str(deal.get('Store', '')).lower():
+            return False
+        if watch.get('category') and watch['category'].lower() != str(deal.get('Category', '')).lower():
+            return False
+        if watch.get('max_price') is not None:
+            price = deal.get('Price_Value')
+            if price is None or pd.isna(price) or not (0 < price <= watch['max_price']):
+                return False
+        return True
+
+    def match(self, deal):
+        """Watches that this deal satisfies."""
+        hits = defaultdict(int)
+        for key in self._deal_keys(deal):
+            for watch_id in self.index.get(key, ()):
+                hits[watch_id] += 1
+        for watch_id in self._store_watch_ids(deal.get('Store')):
+            hits[watch_id] += 1
+        return [
+            self.watches[watch_id] for watch_id, n in hits.items()
+            if n == self.required[watch_id] and self._passes_filters(self.watches[watch_id], deal)
+        ]
+
+
+def check_new_deals(deals, watches=None):
+    """Match new deal rows (DataFrame or list of dicts) -> list of alert records."""
+    watches = load_watchlists() if watches is None else watches
+    if not watches:
+        return []
+    if isinstance(deals, pd.DataFrame):
+        deals = deals.to_dict('records')
+
+    matcher = WatchMatcher(watches)
+    alerted_at = datetime.datetime.now().isoformat(timespec='seconds')
+    alerts = []
+    for deal in deals:
+        for watch in matcher.match(deal):
+            alerts.append({
+                'Alerted_At': alerted_at,
+                'Watch_Id': watch['id'],
+                'Watch_Terms': watch.get('terms') or '',
+                'Date': deal.get('Date'),
+                'Store': deal.get('Store'),
+                'Region': deal.get('Region'),
+                'Item': deal.get('Item'),
+                'Original_Name': deal.get('Original_Name'),
+                'Price_Text': deal.get('Price_Text'),
+                'Price_Value': deal.get('Price_Value'),
+                'Valid_Until': deal.get('Valid_Until'),
+            })
+    return alerts
+
+
+def write_alerts(alerts, path=ALERTS_FILE):
+    if not alerts:
+        return
+    pd.DataFrame(alerts).to_csv(path, mode='a', index=False, header=not os.path.exists(path))
+
+
+# --- 3. CLI ---
+def main():
+    parser = argparse.ArgumentParser(description="Manage grocery watchlists.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    add = sub.add_parser("add", help="Add a watch")
+    add.add_argument("terms", nargs="?", default="", help="Keywords that must all appear in the item name")
+    add.add_argument("--store")
+    add.add_argument("--category")
+    add.add_argument("--max-price", type=float)
+    sub.add_parser("list", help="Show all watches")
+    remove = sub.add_parser("remove", help="Delete a watch by id")
+    remove.add_argument("id", type=int)
+    args = parser.parse_args()
+
+    watches = load_watchlists()
+    if args.command == "add":
+        if not (args.terms or args.store or args.category):
+            parser.error("give at least terms, --store or --category")
+        watch = add_watch(watches, args.terms, args.store, args.category, args.max_price)
+        save_watchlists(watches)
+        print(f"✅ Added watch {watch['id']}: {watch}")
+    elif args.command == "list":
+        for w in watches:
+            price = f" <= ${w['max_price']:.2f}" if w.get('max_price') is not None else ""
+            scope = " ".join(f"[{w[k]}]" for k in ("store", "category") if w.get(k))
+            print(f"   {w['id']:>4}  {w.get('terms') or '*'}{price} {scope}")
+        print(f"{len(watches)} watches.")
+    elif args.command == "remove":
+        kept = [w for w in watches if w['id'] != args.id]
+        if len(kept) == len(watches):
+            print(f"[!] No watch with id {args.id}.")
+            return
+        save_watchlists(kept)
+        print(f"✅ Removed watch {args.id}.")
+
+
+if __name__ == "__main__":
+    main()